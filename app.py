@@ -1,4 +1,9 @@
-from flask import Flask, render_template, request, redirect, url_for, session, send_from_directory, jsonify
+from flask import (Flask, render_template, request, redirect, url_for, session, send_from_directory, send_file,
+                   jsonify, Response, stream_with_context)
+from werkzeug.utils import safe_join
+import io
+import json
+import multiprocessing
 import psutil
 from ml import predict_result
 import os
@@ -6,7 +11,6 @@ import os
 # Suppress TensorFlow warning
 os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
 
-import easyocr
 import cv2
 # Imports moved to inside function to prevent startup crashes
 # import yfinance as yf
@@ -14,10 +18,24 @@ from datetime import datetime
 # from nsepython import nse_get_index_quote, nse_quote
 # from deepface import DeepFace # Lazy load this
 from functools import wraps
-from db import (init_db, save_gallery_item, get_gallery_items, get_gallery_count, 
-                delete_gallery_item, create_user, get_all_users, get_user_by_id, 
+from db import (init_db, save_gallery_item, save_gallery_items_bulk, get_gallery_ocr, get_gallery_page, get_gallery_item, search_gallery_items, get_gallery_count, 
+                delete_gallery_items, create_user, get_all_users, get_user_by_id, 
                 update_user, delete_user, get_categories, get_student_count, get_user_count,
-                save_word_data, save_word_image, get_all_word_data, get_word_data_by_id)
+                get_all_word_data, get_word_data_by_id,
+                acquire_blob, release_blob)
+from ocr import packed_text, unpack_results, OCR_MIN_CONFIDENCE
+import ocr_jobs
+from concurrent.futures import as_completed, wait
+from ocr_cache import ocr_cache, cache_key
+from preprocess import PRESETS, preset_for_category, decode_image
+import warmup
+from variants import variant_store
+from face_analysis import face_analyzer, MODES as FACE_MODES
+from thumbnails import thumbnails
+from blob_store import blob_store, content_hash, file_extension
+import gallery_io
+import reclaimer
+import word_jobs
 
 
 app = Flask(__name__)
@@ -28,16 +46,6 @@ WORD_IMAGES_FOLDER = os.path.join("static", "word_images")
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 app.config["WORD_IMAGES_FOLDER"] = WORD_IMAGES_FOLDER
 
-# reader = easyocr.Reader(['en']) # Lazy load this
-reader = None
-
-def get_reader():
-    global reader
-    if reader is None:
-        print("Lazy loading EasyOCR...")
-        reader = easyocr.Reader(['en'])
-    return reader
-
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 
@@ -67,10 +75,28 @@ with app.app_context():
     init_db()
     print("Database Initialized.")
 
+# `python app.py` runs with the debug reloader: the parent process only watches the sources and
+# restarts a child (WERKZEUG_RUN_MAIN=true) that serves requests, so background threads belong in the child.
+# Spawned OCR workers also import this module (as __mp_main__) and start none of them.
+if multiprocessing.parent_process() is None and (
+        __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+    # Load models in the background when WARMUP_MODELS=1
+    warmup.start()
+    # Unlink files of deleted gallery items in the background (also drains what a previous run left)
+    reclaimer.start()
+    # Resume Word extraction jobs interrupted by a restart
+    word_jobs.start()
+
 @app.route('/robots.txt')
 def robots():
     return send_from_directory('static', 'robots.txt')
 
+@app.route('/readyz')
+def readyz():
+    """Readiness probe for the load balancer: 503 until warm-up has finished"""
+    status = warmup.status()
+    return jsonify(status), 200 if status['ready'] else 503
+
 @app.route('/', methods=['GET', 'POST'])
 def login():
     if 'user' in session:
@@ -334,149 +360,67 @@ def upload():
     if request.method == "POST":
         file = request.files["image"]
         category_id = request.form.get("category_id", default=1, type=int) 
+        preset = get_ocr_preset(category_id)
+        if preset is None:
+            return jsonify({"success": False, "error": "Unknown preprocessing preset"}), 400
         
-        path = os.path.join(app.config["UPLOAD_FOLDER"], file.filename)
-        file.save(path)
+        # Decoded at most once, straight from memory, and shared by the face, compositing and OCR stages
+        data = file.read()
+        img = None
 
         try:
             # Hair Style Category Processing
             if category_id == 2:
+                img = decode_image(data)
                 
-                # Analyze Face
-                from deepface import DeepFace
-                objs = DeepFace.analyze(img_path = path, actions = ['gender'], enforce_detection=False)
-                gender = objs[0]['dominant_gender']
-                
-                # Generate 8 Variants (Simulated)
-                # Generate Variants with Hair Overlays
-                variants = []
-                base_img = cv2.imread(path)
+                # Analyze Face (resident models; cached per image content)
+                face_mode = request.form.get("face_mode") or None
+                if face_mode is not None and face_mode not in FACE_MODES:
+                    return jsonify({"success": False, "error": "Unknown face analysis mode"}), 400
+                analysis = face_analyzer.analyze(img, key=content_hash(data), mode=face_mode)
+                gender = analysis['dominant_gender']
                 
                 # Detect face region for scaling hair
                 # DeepFace analyze returns region in 'region': {'x':, 'y':, 'w':, 'h':}
-                face_region = objs[0]['region']
-                fx, fy, fw, fh = face_region['x'], face_region['y'], face_region['w'], face_region['h']
-                
-                # Select asset folder based on gender
-                asset_folder = "male" if gender == "Man" else "female"
-                asset_dir = os.path.join("static", "hair_assets", asset_folder)
-                
+                face_region = analysis['region']
                 print(f"DEBUG: Gender detected: {gender}")
-                print(f"DEBUG: Asset Directory: {os.path.abspath(asset_dir)}")
 
-                # Ensure assets exist, if not use fallback or list available
-                available_assets = []
-                if os.path.exists(asset_dir):
-                    available_assets = sorted([f for f in os.listdir(asset_dir) if f.endswith('.png')])
-                    print(f"DEBUG: Found assets: {available_assets}")
-                else:
-                    print(f"DEBUG: Asset directory not found: {asset_dir}")
-                
-                # Generate 8 variants (cycling through available assets if fewer than 8)
-                for i in range(1, 9):
-                    variant_img = base_img.copy()
-                    
-                    if available_assets:
-                        # Cycle through assets: 0, 1, 0, 1...
-                        asset_name = available_assets[(i-1) % len(available_assets)]
-                        asset_path = os.path.join(asset_dir, asset_name)
-                        
-                        # Load hair asset (uncached for simplicity)
-                        hair_img = cv2.imread(asset_path, cv2.IMREAD_UNCHANGED) # Load with Alpha
-                        
-                        if hair_img is not None:
-                            print(f"DEBUG: Applied asset {asset_name} for variant {i}")
-                            # Resize hair to fit face width (plus some padding)
-                            # Heuristic: Hair width = 1.2 * face width
-                            scale_factor = 1.3
-                            target_width = int(fw * scale_factor)
-                            aspect_ratio = hair_img.shape[0] / hair_img.shape[1]
-                            target_height = int(target_width * aspect_ratio)
-                            
-                            hair_resized = cv2.resize(hair_img, (target_width, target_height))
-                            
-                            # Calculate position: centered on face x, and sitting a bit above face y
-                            # Heuristic: Hair bottom around eyebrows (y + h/3) or top of head (y)
-                            # Let's align top of hair a bit above the face box
-                            # x pos: center of hair = center of face
-                            
-                            face_center_x = fx + fw // 2
-                            hair_x = face_center_x - target_width // 2
-                            hair_y = fy - int(target_height * 0.45) # Shift up significantly
-                            
-                            # Overlay logic (handling boundaries and alpha)
-                            y1, y2 = hair_y, hair_y + target_height
-                            x1, x2 = hair_x, hair_x + target_width
-                            
-                            alpha_s = hair_resized[:, :, 3] / 255.0
-                            alpha_l = 1.0 - alpha_s
-                            
-                            # Iterate channels
-                            for c in range(0, 3):
-                                # Define clipping for image boundaries
-                                r_y1, r_y2 = max(0, y1), min(variant_img.shape[0], y2)
-                                r_x1, r_x2 = max(0, x1), min(variant_img.shape[1], x2)
-                                
-                                # asset offsets if cropped
-                                a_y1 = max(0, -y1)
-                                a_y2 = a_y1 + (r_y2 - r_y1)
-                                a_x1 = max(0, -x1)
-                                a_x2 = a_x1 + (r_x2 - r_x1)
-                                
-                                if r_y2 > r_y1 and r_x2 > r_x1:
-                                    variant_img[r_y1:r_y2, r_x1:r_x2, c] = (alpha_s[a_y1:a_y2, a_x1:a_x2] * hair_resized[a_y1:a_y2, a_x1:a_x2, c] +
-                                                                            alpha_l[a_y1:a_y2, a_x1:a_x2] * variant_img[r_y1:r_y2, r_x1:r_x2, c])
-                    else:
-                         # Fallback if no assets found
-                        variant_img = cv2.applyColorMap(variant_img, cv2.COLORMAP_AUTUMN if i%2==0 else cv2.COLORMAP_WINTER)
-
-                        
-                    variant_filename = f"variant_{i}_{file.filename}"
-                    variant_path = os.path.join(app.config["UPLOAD_FOLDER"], variant_filename)
-                    cv2.imwrite(variant_path, variant_img)
-                    
-                    variants.append({
-                        "id": i,
-                        "src": url_for('uploaded_file', filename=variant_filename),
-                        "filename": variant_filename,
-                        "style": f"Style {i} ({gender})"
-                    })
+                # Variants are rendered lazily by /variant/<token>/<i> from the decoded original;
+                # only the chosen variant is stored, so the original is not written to disk
+                token = variant_store.create(img, file.filename, gender, face_region)
+                session_data = variant_store.get(token)
+                # Warm the previews in parallel while the browser opens the selection modal
+                variant_store.prerender(session_data, VARIANT_PREVIEW_WIDTH)
+                variants = []
+                for recipe in variant_store.recipes(session_data):
+                    recipe["src"] = url_for('variant_image', token=token, variant_id=recipe["id"], w=VARIANT_PREVIEW_WIDTH)
+                    variants.append(recipe)
 
                 if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                     return jsonify({
                         "success": True, 
                         "type": "selection_required",
+                        "token": token,
                         "variants": variants,
                         "original_filename": file.filename,
                         "gender": gender
                     })
 
             # General/OCR Processing
-            # Read image
-            img = cv2.imread(path)
-
-            # EasyOCR reading
-            reader_instance = get_reader()
-            results = reader_instance.readtext(img)
-
-            # Combine detected text
-            lines = []
-            for (bbox, detected_text, prob) in results:
-                if prob > 0.4:  # confidence filter
-                    lines.append(detected_text)
-
-            text = "\n".join(lines)
-            
-            # Save to database
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            save_gallery_item(file.filename, text, timestamp, category_id)
-            
-            entry = {
-                "filename": file.filename,
-                "text": text,
-                "timestamp": timestamp,
-                "category_id": category_id
-            }
+            blob = store_upload(data, file.filename)
+            meta = {"filename": blob["path"], "blob_hash": blob["hash"], "category_id": category_id,
+                    "cache_key": cache_key(data, preset), "write": blob["write"]}
+            try:
+                packed = ocr_cache.get(meta["cache_key"])
+                if packed is None:
+                    # Runs on the OCR worker pool; this thread only waits for the result.
+                    # The worker gets the bytes (or the array decoded above), never a file path
+                    packed = ocr_jobs.run_ocr(img if img is not None else data, preset)
+                entry = save_ocr_entry(packed, meta)
+            except Exception:
+                release_upload(meta)
+                raise
+            text = entry["text"]
             
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 return jsonify({"success": True, "entry": entry})
@@ -489,29 +433,346 @@ def upload():
 
     return render_template("upload.html", text=text)
 
+def sse_event(event, payload):
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+@app.route('/upload/stream', methods=['POST'])
+@login_required
+def upload_stream():
+    """
+    OCR upload that streams each recognised line as a Server-Sent Event
+    (text, bbox, confidence) and finishes with a 'done' event carrying the saved gallery entry.
+    OCR runs on the ocr_jobs pool; the request thread only forwards the lines a worker recognises.
+    """
+    file = request.files.get("image")
+    if file is None or file.filename == '':
+        return jsonify({"success": False, "error": "No image uploaded"}), 400
+    category_id = request.form.get("category_id", default=1, type=int)
+    preset = get_ocr_preset(category_id)
+    if preset is None:
+        return jsonify({"success": False, "error": "Unknown preprocessing preset"}), 400
+
+    data = file.read()
+    blob = store_upload(data, file.filename)
+    meta = {"filename": blob["path"], "blob_hash": blob["hash"], "category_id": category_id,
+            "cache_key": cache_key(data, preset), "write": blob["write"]}
+
+    def generate():
+        saved = False
+        future = None
+        try:
+            packed = ocr_cache.get(meta["cache_key"])
+            if packed is None:
+                lines, future = ocr_jobs.stream_ocr(data, preset)
+                for index, (bbox, detected_text, prob) in enumerate(lines):
+                    yield sse_event("line", {
+                        "index": index,
+                        "text": detected_text,
+                        "bbox": bbox,
+                        "confidence": prob,
+                        "kept": prob > OCR_MIN_CONFIDENCE
+                    })
+                packed = future.result()
+
+            entry = save_ocr_entry(packed, meta)
+            saved = True
+            yield sse_event("done", {"success": True, "entry": entry})
+        except Exception as e:
+            print(e)
+            yield sse_event("error", {"success": False, "error": str(e)})
+        finally:
+            # Also covers clients that disconnect mid-stream
+            if future is not None:
+                future.cancel()
+            if not saved:
+                release_upload(meta)
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def get_ocr_preset(category_id):
+    """Preprocessing preset from the form, falling back to the category default (None if unknown)"""
+    preset = request.form.get("preset") or preset_for_category(category_id)
+    return preset if preset in PRESETS else None
+
+
+def save_ocr_entry(packed, meta):
+    """Persist packed OCR results as a gallery item (plus its gallery_ocr row) and return the entry"""
+    if meta.get("cache_key"):
+        ocr_cache.put(meta["cache_key"], packed)
+
+    text = packed_text(packed)
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    item_id = save_gallery_item(meta["filename"], text, timestamp, meta["category_id"], ocr=packed,
+                                blob_hash=meta.get("blob_hash"))
+    return {
+        "id": item_id,
+        "filename": meta["filename"],
+        "text": text,
+        "timestamp": timestamp,
+        "category_id": meta["category_id"]
+    }
+
+
+def store_upload(data, filename):
+    """
+    Store upload bytes as a content-addressed blob and take a reference on it.
+    Returns {'hash', 'path', 'size', 'write'}; 'path' (ab/cd/<sha256>.<ext>) is the gallery filename
+    and 'write' the Future of the file write, which release_upload() settles before unlinking.
+    """
+    blob = blob_store.describe(data, filename)
+    # Same bytes stored earlier under another extension: use (and write) that path,
+    # the one delete and the reclaimer will unlink
+    blob["path"] = acquire_blob(blob)
+    # Written off the request path, after the reference exists: this also restores a file
+    # that a concurrent delete removed just before our reference was taken
+    blob["write"] = blob_store.write_async(data, blob)
+    return blob
+
+
+def release_upload(meta):
+    """
+    Give back the blob reference of an upload that did not make it into the gallery.
+    Its queued file write is cancelled (or waited for if already running) first, so it
+    cannot land after release_blob() unlinked the file and leave an orphan behind.
+    """
+    write = meta.get("write")
+    if write is not None and not write.cancel():
+        wait([write])
+    if meta.get("blob_hash"):
+        release_blob(meta["blob_hash"], blob_store.unlink)
+
+
+# ===== OCR JOB API =====
+
+@app.route('/api/ocr/jobs', methods=['POST'])
+@login_required
+def submit_ocr_job():
+    """Save the upload, queue it for OCR and return the job id right away"""
+    file = request.files.get("image")
+    if file is None or file.filename == '':
+        return jsonify({"success": False, "error": "No image uploaded"}), 400
+    category_id = request.form.get("category_id", default=1, type=int)
+
+    preset = get_ocr_preset(category_id)
+    if preset is None:
+        return jsonify({"success": False, "error": "Unknown preprocessing preset"}), 400
+
+    data = file.read()
+    blob = store_upload(data, file.filename)
+    meta = {"filename": blob["path"], "blob_hash": blob["hash"], "category_id": category_id,
+            "cache_key": cache_key(data, preset), "write": blob["write"]}
+
+    try:
+        # Duplicate upload: skip the queue and answer straight from the cache
+        packed = ocr_cache.get(meta["cache_key"])
+        if packed is not None:
+            return jsonify({"success": True, "cached": True, "entry": save_ocr_entry(packed, meta)})
+
+        job_id = ocr_jobs.submit_job(data, meta=meta, on_success=save_ocr_entry,
+                                     preset=preset, on_failure=release_upload)
+    except Exception:
+        release_upload(meta)
+        raise
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status_url": url_for('ocr_job_status', job_id=job_id),
+        "result_url": url_for('ocr_job_result', job_id=job_id)
+    }), 202
+
+
+@app.route('/api/ocr/jobs/<job_id>')
+@login_required
+def ocr_job_status(job_id):
+    job = ocr_jobs.get_job(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status": job["status"],
+        "elapsed": job["elapsed"],
+        "error": job["error"]
+    })
+
+
+@app.route('/api/ocr/jobs/<job_id>/result')
+@login_required
+def ocr_job_result(job_id):
+    job = ocr_jobs.get_job(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    if job["status"] == "failed":
+        return jsonify({"success": False, "status": "failed", "error": job["error"]}), 500
+    if job["status"] != "done":
+        return jsonify({"success": False, "status": job["status"]}), 202
+    return jsonify({"success": True, "status": "done", "entry": job["result"]})
+
+
+@app.route('/upload_batch', methods=['POST'])
+@login_required
+def upload_batch():
+    """
+    OCR many images in one request.
+    Files are fanned out over the OCR worker pool and a JSON line is streamed back
+    for each file as it finishes; all gallery rows are inserted in one bulk transaction.
+    """
+    files = [f for f in request.files.getlist("images") if f.filename]
+    if not files:
+        return jsonify({"success": False, "error": "No images uploaded"}), 400
+    category_id = request.form.get("category_id", default=1, type=int)
+    preset = get_ocr_preset(category_id)
+    if preset is None:
+        return jsonify({"success": False, "error": "Unknown preprocessing preset"}), 400
+
+    # Save uploads and resolve cache hits before streaming starts (request files close afterwards)
+    pending = []
+    try:
+        for file in files:
+            data = file.read()
+            blob = store_upload(data, file.filename)
+            key = cache_key(data, preset)
+            packed = ocr_cache.get(key)
+            pending.append({"filename": file.filename, "blob_path": blob["path"], "blob_hash": blob["hash"],
+                            "write": blob["write"], "data": data if packed is None else None,
+                            "cache_key": key, "ocr": packed})
+    except Exception:
+        for item in pending:
+            release_upload(item)
+        raise
+
+    def generate():
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows, new_cache_entries = [], {}
+        futures = {}
+        saved = False
+
+        try:
+            for item in pending:
+                if item["ocr"] is None:
+                    futures[ocr_jobs.submit_ocr(item.pop("data"), preset)] = item
+                else:
+                    text = packed_text(item["ocr"])
+                    rows.append({"filename": item["blob_path"], "blob_hash": item["blob_hash"], "text": text,
+                                 "ocr": item["ocr"], "timestamp": timestamp, "category_id": category_id})
+                    yield json.dumps({"filename": item["filename"], "success": True,
+                                      "cached": True, "text": text}) + "\n"
+
+            for future in as_completed(futures):
+                item = futures[future]
+                try:
+                    packed = future.result()
+                except Exception as e:
+                    release_upload(item)
+                    item["released"] = True
+                    yield json.dumps({"filename": item["filename"], "success": False, "error": str(e)}) + "\n"
+                    continue
+                text = packed_text(packed)
+                new_cache_entries[item["cache_key"]] = packed
+                rows.append({"filename": item["blob_path"], "blob_hash": item["blob_hash"], "text": text,
+                             "ocr": packed, "timestamp": timestamp, "category_id": category_id})
+                yield json.dumps({"filename": item["filename"], "success": True,
+                                  "cached": False, "text": text}) + "\n"
+
+            try:
+                count = len(save_gallery_items_bulk(rows))
+                saved = True
+                ocr_cache.put_many(new_cache_entries)
+                yield json.dumps({"done": True, "success": True, "saved": count, "total": len(pending)}) + "\n"
+            except Exception as e:
+                yield json.dumps({"done": True, "success": False, "error": str(e)}) + "\n"
+        finally:
+            # Also covers clients that disconnect mid-stream: nothing was saved, give back
+            # the references still held and drop OCR work nobody will read
+            if not saved:
+                for future in futures:
+                    future.cancel()
+                for item in pending:
+                    if not item.get("released"):
+                        release_upload(item)
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+@app.route('/api/ocr/cache/stats')
+@login_required
+def ocr_cache_stats():
+    return jsonify({"success": True, "stats": ocr_cache.stats()})
+
+
+@app.route('/api/face/cache/stats')
+@login_required
+def face_cache_stats():
+    return jsonify({"success": True, "stats": face_analyzer.stats()})
+
+
+# Gallery items per page (first render and infinite scroll)
+GALLERY_PAGE_SIZE = 50
+
+# Width of the variant previews shown in the selection modal
+VARIANT_PREVIEW_WIDTH = 480
+
+
+@app.route('/variant/<token>/<int:variant_id>')
+@login_required
+def variant_image(token, variant_id):
+    """Render one Hair Style variant on first request (?w= width in pixels) and serve the encoded preview"""
+    session_data = variant_store.get(token)
+    if session_data is None or not 1 <= variant_id <= len(session_data['assets']):
+        return jsonify({"success": False, "error": "Variant not found"}), 404
+    width = request.args.get('w', default=VARIANT_PREVIEW_WIDTH, type=int)
+    width = min(max(width, 64), 4096)
+
+    data, timings = variant_store.preview(session_data, variant_id, width)
+    server_timing = ", ".join(f"{stage};dur={ms}" for stage, ms in timings.items())
+    return Response(data, mimetype=variant_store.mimetype,
+                    headers={"Cache-Control": "private, max-age=1800", "Server-Timing": server_timing})
+
+
+@app.route('/api/variants/stats')
+@login_required
+def variant_stats():
+    return jsonify({"success": True, "stats": variant_store.stats()})
+
+
 @app.route('/save_variant', methods=['POST'])
 @login_required
 def save_variant():
     try:
         data = request.json
-        filename = data.get('filename')
-        original_filename = data.get('original_filename')
+        token = data.get('token')
+        variant_id = int(data.get('variant_id', 0))
         category_id = data.get('category_id', 2)
         style_name = data.get('style_name', 'Custom Style')
-        
-        # Cleanup unused variants
-        if original_filename:
-            for i in range(1, 9):
-                variant_name = f"variant_{i}_{original_filename}"
-                if variant_name != filename:
-                    variant_path = os.path.join(app.config["UPLOAD_FOLDER"], variant_name)
-                    if os.path.exists(variant_path):
-                        os.remove(variant_path)
+
+        session_data = variant_store.get(token)
+        if session_data is None or not 1 <= variant_id <= len(session_data['assets']):
+            return jsonify({"success": False, "error": "Variant session expired"}), 404
+
+        # Only the chosen variant is rendered at full size and stored
+        variant_name = f"variant_{variant_id}_{session_data['filename']}"
+        variant_img = variant_store.render(session_data, variant_id)
+        ext = file_extension(variant_name)
+        ok, buf = cv2.imencode(ext, variant_img)
+        if not ok:
+            raise ValueError(f"Could not encode variant as {ext}")
+        blob = store_upload(buf.tobytes(), variant_name)
+        filename = blob["path"]
+        variant_store.finish(token)
         
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        save_gallery_item(filename, f"AI {style_name}", timestamp, category_id)
+        try:
+            item_id = save_gallery_item(filename, f"AI {style_name}", timestamp, category_id, blob_hash=blob["hash"])
+        except Exception:
+            release_upload({"blob_hash": blob["hash"], "write": blob["write"]})
+            raise
         
         entry = {
+            "id": item_id,
             "filename": filename,
             "text": f"AI {style_name}",
             "timestamp": timestamp,
@@ -525,20 +786,59 @@ def save_variant():
 @login_required
 def delete_item(item_id):
     try:
-        filename = delete_gallery_item(item_id)
+        # The file is queued for the reclaimer only when no other gallery item shares the same bytes
+        deleted, queued = delete_gallery_items(ids=[item_id])
         
-        if not filename:
+        if not deleted:
             return jsonify({"success": False, "error": "Item not found"}), 404
-        
-        # Delete file from disk
-        file_path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        if queued:
+            reclaimer.wake()
         
         return jsonify({"success": True})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+
+def parse_date_filter(value):
+    """'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS' -> datetime (None if empty); ValueError if malformed"""
+    if not value:
+        return None
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid date: {value}")
+
+
+@app.route('/api/gallery/delete', methods=['POST'])
+@login_required
+def delete_items():
+    """
+    Batch delete: JSON {"ids": [...]} and/or {"category_id", "since", "until"} (since <= timestamp < until).
+    Rows go in one set-based DELETE; their files are unlinked later by the background reclaimer.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        ids = data.get('ids')
+        category_id = data.get('category_id')
+        if ids is not None and (not isinstance(ids, list) or not all(isinstance(i, int) for i in ids)):
+            return jsonify({"success": False, "error": "ids must be a list of integers"}), 400
+        try:
+            since, until = parse_date_filter(data.get('since')), parse_date_filter(data.get('until'))
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        # Refuse an unfiltered request rather than wiping the whole gallery
+        if not ids and not category_id and not since and not until:
+            return jsonify({"success": False, "error": "Give ids or a category/date filter"}), 400
+
+        deleted, queued = delete_gallery_items(ids=ids or None, category_id=category_id, since=since, until=until)
+        if queued:
+            reclaimer.wake()
+        return jsonify({"success": True, "deleted": deleted, "queued_files": queued})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
 @app.route('/edit_user/<int:user_id>', methods=['GET'])
 def edit_user(user_id):
     """Render edit user page - actual data loading happens via FastAPI in the frontend"""
@@ -558,170 +858,170 @@ def delete_user_route(user_id):
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
-@app.route('/uploads/<filename>')
+@app.route('/uploads/<path:filename>')
 @login_required
 def uploaded_file(filename):
     return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
 
+
+# Browsers may reuse a thumbnail this long before revalidating it with its ETag
+THUMB_MAX_AGE = 86400
+
+
+@app.route('/thumbs/<int:size>/<path:filename>')
+@login_required
+def thumbnail(size, filename):
+    """Thumbnail of an upload in the size bucket covering ?size, with ETag / 304 support"""
+    source = safe_join(app.config['UPLOAD_FOLDER'], filename)
+    if source is None:
+        return jsonify({"success": False, "error": "Not found"}), 404
+    path, etag = thumbnails.get(source, size)
+    if path is None:
+        return jsonify({"success": False, "error": "Not found"}), 404
+
+    response = send_file(path, mimetype=thumbnails.mimetype, etag=etag, conditional=True, max_age=THUMB_MAX_AGE)
+    response.cache_control.public = False
+    response.cache_control.private = True
+    return response
+
+
+@app.route('/api/thumbs/stats')
+@login_required
+def thumbnail_stats():
+    return jsonify({"success": True, "stats": thumbnails.stats()})
+
 @app.route('/gallery')
 def gallery():
     if 'user' not in session:
         return redirect(url_for('login'))
     
     categories = get_categories()
-    data = get_gallery_items()
+    # First page only; the template loads the rest from /api/gallery while scrolling
+    page = get_gallery_page(limit=GALLERY_PAGE_SIZE)
     
-    return render_template('gallery.html', gallery_items=data, categories=categories)
+    return render_template('gallery.html', gallery_items=page['items'], next_before=page['next_before'],
+                           categories=categories)
 
 
-@app.route('/logout')
-def logout():
-    session.pop('user', None)
-    return redirect(url_for('login'))
+@app.route('/api/gallery')
+@login_required
+def gallery_list():
+    """Keyset-paginated gallery listing without OCR text (?before=<last id>&limit=&category_id=)"""
+    before = request.args.get('before', type=int)
+    limit = min(max(request.args.get('limit', default=GALLERY_PAGE_SIZE, type=int), 1), 200)
+    category_id = request.args.get('category_id', type=int)
 
+    page = get_gallery_page(before=before, limit=limit, category_id=category_id)
+    return jsonify({"success": True, "items": page['items'], "next_before": page['next_before']})
 
-# ===== WORD EXTRACTION LOGIC =====
 
-def extract_word_content(file_path, filename):
-    """Extract and organize images from a Word document (.docx) with per-category rounds"""
-    from docx import Document
-    import os
-    import uuid
-    import re
-    from docx.oxml.ns import qn
-    
-    doc = Document(file_path)
-    
-    # Store minimal entry
-    word_id = save_word_data(filename, "")
-    
-    # Category and Round management
-    categories = ["תרגול", "שליחה לקלינאית"]
-    current_category = "תרגול" # Default
-    round_counters = {cat: -1 for cat in categories} # Initialize all at -1
-    
-    # Helper to sanitize folder/file names
-    def sanitize(name):
-        return re.sub(r'[\\/*?:"<>|]', "", name).strip().replace(" ", "_")
+@app.route('/api/gallery/<int:item_id>')
+@login_required
+def gallery_item(item_id):
+    """One gallery item including its OCR text"""
+    item = get_gallery_item(item_id)
+    if item is None:
+        return jsonify({"success": False, "error": "Item not found"}), 404
+    return jsonify({"success": True, "item": item})
 
-    # Map to track filenames within the same folder to prevent overwrites
-    used_filenames = {} # (full_dir) -> [filenames]
 
-    rel_map = {rel.rId: rel.target_part for rel in doc.part.rels.values() if "image" in rel.target_ref}
-    last_text = ""
+@app.route('/api/gallery/export')
+@login_required
+def gallery_export():
+    """Stream every gallery row (?category_id=) as NDJSON or a JSON array (?format=ndjson|json)"""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in gallery_io.FORMATS:
+        return jsonify({"success": False, "error": "Unknown export format"}), 400
+    category_id = request.args.get('category_id', type=int)
+    chunk_size = min(max(request.args.get('chunk_size', default=gallery_io.EXPORT_CHUNK_SIZE, type=int), 1), 10000)
 
-    for para in doc.paragraphs:
-        para_text = para.text.strip()
-        
-        # Check for category/round markers
-        found_marker = False
-        for cat in categories:
-            if cat in para_text:
-                current_category = cat
-                # Increment on EACH occurrence found to create a new round
-                round_counters[cat] += 1
-                found_marker = True
-                break
-        
-        # If no marker, it might be a label for an image
-        # Iterate through runs
-        for run in para.runs:
-            run_text = run.text.strip()
-            if run_text and not any(cat in run_text for cat in categories):
-                last_text = run_text
-            
-            # Find images
-            blip_ids = []
-            for el in run.element.iter():
-                if el.tag.endswith('blip'):
-                    embed_id = el.get(qn('r:embed'))
-                    if embed_id:
-                        blip_ids.append(embed_id)
-            
-            for blip_id in blip_ids:
-                if blip_id in rel_map:
-                    # If we haven't seen a round marker yet for the default category, start it at 0
-                    if round_counters[current_category] == -1:
-                        round_counters[current_category] = 0
-
-                    target_part = rel_map[blip_id]
-                    img_data = target_part.blob
-                    img_ext = target_part.partname.split('.')[-1]
-                    
-                    cat_folder = sanitize(current_category)
-                    round_folder = f"round_{round_counters[current_category]}"
-                    label_name = sanitize(last_text) if last_text else "image"
-                    
-                    relative_dir = os.path.join(cat_folder, round_folder)
-                    full_dir = os.path.join(app.config["WORD_IMAGES_FOLDER"], relative_dir)
-                    os.makedirs(full_dir, exist_ok=True)
-                    
-                    # Duplicate handling: label.ext, label_1.ext, etc.
-                    if full_dir not in used_filenames:
-                        used_filenames[full_dir] = []
-                    
-                    base_filename = f"{label_name}.{img_ext}"
-                    final_filename = base_filename
-                    counter = 1
-                    while final_filename in used_filenames[full_dir]:
-                        final_filename = f"{label_name}_{counter}.{img_ext}"
-                        counter += 1
-                    
-                    used_filenames[full_dir].append(final_filename)
-                    
-                    img_save_path = os.path.join(full_dir, final_filename)
-                    db_image_path = os.path.join(relative_dir, final_filename)
-                    
-                    import shutil
-                    
-                    # Audio mapping logic
-                    audio_source_dir = os.path.join(app.config["WORD_IMAGES_FOLDER"], "images_audio")
-                    audio_filename = None
-                    db_audio_path = None
-                    
-                    if last_text:
-                        # Check for .ogg, .mp3, or .wav
-                        # Check BOTH raw label (with spaces) and sanitized label
-                        potential_names = [last_text, label_name]
-                        for name in potential_names:
-                            if not name: continue
-                            for ext in ["ogg", "mp3", "wav"]:
-                                potential_audio = f"{name}.{ext}"
-                                source_audio_path = os.path.join(audio_source_dir, potential_audio)
-                                
-                                if os.path.exists(source_audio_path):
-                                    # Use exact same name as image file (different extension)
-                                    image_basename = os.path.splitext(final_filename)[0]
-                                    audio_target_name = f"{image_basename}.{ext}"
-                                    target_audio_path = os.path.join(full_dir, audio_target_name)
-                                    
-                                    try:
-                                        # Use copy2 to keep source for other images with same label
-                                        shutil.copy2(source_audio_path, target_audio_path)
-                                        db_audio_path = os.path.join(relative_dir, audio_target_name)
-                                        break # Found and copied
-                                    except Exception as e:
-                                        print(f"Error copying audio: {e}")
-                            if db_audio_path: break # Stop if found
-
-                    with open(img_save_path, "wb") as f:
-                        f.write(img_data)
-                    
-                    save_word_image(
-                        word_id, 
-                        db_image_path, 
-                        label=last_text if last_text else "Unnamed Image",
-                        category=current_category,
-                        round_number=round_counters[current_category],
-                        audio_path=db_audio_path
-                    )
-            
-    return word_id
+    mimetype = "application/x-ndjson" if fmt == 'ndjson' else "application/json"
+    return Response(stream_with_context(gallery_io.iter_export(fmt, category_id, chunk_size)), mimetype=mimetype,
+                    headers={"Content-Disposition": f"attachment; filename=gallery_export.{fmt}"})
+
+
+@app.route('/api/gallery/import', methods=['POST'])
+@login_required
+def gallery_import():
+    """Import an NDJSON / JSON export (file field 'file') in bulk batches (?batch_size=) and report rows/sec"""
+    file = request.files.get("file")
+    if file is None or file.filename == '':
+        return jsonify({"success": False, "error": "No file uploaded"}), 400
+    fmt = request.form.get('format') or gallery_io.format_for(file.filename)
+    if fmt not in gallery_io.FORMATS:
+        return jsonify({"success": False, "error": "Unknown import format"}), 400
+    batch_size = min(max(request.form.get('batch_size', default=gallery_io.IMPORT_BATCH_SIZE, type=int), 1), 10000)
+
+    stats = {}
+    try:
+        # Parsed straight from the upload stream, never held in memory as a whole
+        gallery_io.import_stream(io.TextIOWrapper(file.stream, encoding="utf-8"), fmt, batch_size, stats=stats)
+    except ValueError as e:
+        # Batches before the bad row are committed; stats says how many rows made it in
+        return jsonify({"success": False, "error": f"Invalid {fmt} input: {e}", "stats": stats}), 400
+    return jsonify({"success": True, "stats": stats})
+
+
+@app.route('/api/gallery/search')
+@login_required
+def gallery_search():
+    """Ranked full-text search over gallery OCR text with prefix matching"""
+    query = request.args.get('q', '').strip()
+    category_id = request.args.get('category_id', type=int)
+    page = max(request.args.get('page', default=1, type=int), 1)
+    page_size = min(max(request.args.get('page_size', default=20, type=int), 1), 100)
+
+    result = search_gallery_items(query, category_id=category_id, page=page, page_size=page_size)
+    return jsonify({
+        "success": True,
+        "query": query,
+        "page": page,
+        "page_size": page_size,
+        "total": result['total'],
+        "items": result['items']
+    })
+
+
+@app.route('/api/gallery/<int:item_id>/text')
+@login_required
+def gallery_item_text(item_id):
+    """
+    Re-derive an item's text at any confidence threshold from its stored OCR output
+    (?min_confidence=0.6); ?lines=1 also returns every line with its bbox and confidence.
+    """
+    packed = get_gallery_ocr(item_id)
+    if packed is None:
+        return jsonify({"success": False, "error": "No OCR data for this item"}), 404
+    min_confidence = request.args.get('min_confidence', default=OCR_MIN_CONFIDENCE, type=float)
+
+    result = {
+        "success": True,
+        "id": item_id,
+        "min_confidence": min_confidence,
+        "num_lines": packed["num_lines"],
+        "text": packed_text(packed, min_confidence)
+    }
+    if request.args.get('lines') == '1':
+        boxes, confidences, texts = unpack_results(packed)
+        result["lines"] = [
+            {"text": t, "bbox": box.tolist(), "confidence": float(conf)}
+            for t, box, conf in zip(texts, boxes, confidences)
+        ]
+    return jsonify(result)
 
 
+@app.route('/logout')
+def logout():
+    session.pop('user', None)
+    return redirect(url_for('login'))
+
+
+# ===== WORD EXTRACTION LOGIC =====
+
 @app.route('/upload_word', methods=['GET', 'POST'])
 @login_required
 def upload_word():
+    """Queue a .docx for background extraction and return the job id right away"""
     if request.method == 'POST':
         if 'word_file' not in request.files:
             return jsonify({"success": False, "error": "No file part"}), 400
@@ -731,20 +1031,38 @@ def upload_word():
             return jsonify({"success": False, "error": "No selected file"}), 400
         
         if file and file.filename.endswith('.docx'):
-            file_path = os.path.join(app.config["UPLOAD_FOLDER"], file.filename)
-            file.save(file_path)
-            
             try:
-                word_id = extract_word_content(file_path, file.filename)
-                return jsonify({"success": True, "word_id": word_id})
+                job_id = word_jobs.submit(file.read(), file.filename)
             except Exception as e:
                 return jsonify({"success": False, "error": str(e)}), 500
+            return jsonify({"success": True, "job_id": job_id,
+                            "status_url": url_for('word_job_status', job_id=job_id)}), 202
         else:
             return jsonify({"success": False, "error": "Invalid file type. Only .docx allowed."}), 400
 
     return render_template('upload.html') # Reusing upload.html or creating specific one
 
 
+@app.route('/api/word/jobs/<job_id>')
+@login_required
+def word_job_status(job_id):
+    """Progress of a Word extraction job; a finished job links to its word_detail page"""
+    job = word_jobs.get_job(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    if job["status"] == "done" and job["word_data_id"]:
+        job["detail_url"] = url_for('word_detail', item_id=job["word_data_id"])
+    return jsonify({"success": True, "job": job})
+
+
+@app.route('/api/word/jobs/<job_id>/cancel', methods=['POST'])
+@login_required
+def cancel_word_job(job_id):
+    if not word_jobs.cancel(job_id):
+        return jsonify({"success": False, "error": "Job not found or already finished"}), 409
+    return jsonify({"success": True, "job_id": job_id})
+
+
 @app.route('/word_data')
 @login_required
 def word_data_list():
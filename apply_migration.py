@@ -1,5 +1,6 @@
 import pymysql
 import os
+import sys
 
 # Database configuration (matching django_settings.py)
 DB_CONFIG = {
@@ -10,9 +11,8 @@ DB_CONFIG = {
     'port': 3306,
 }
 
-def apply_migration():
-    """Apply the init_db.sql migration to the MySQL database."""
-    sql_file = 'init_db.sql'
+def apply_migration(sql_file='init_db.sql'):
+    """Apply a SQL migration (init_db.sql by default) to the MySQL database."""
     
     if not os.path.exists(sql_file):
         print(f"Error: {sql_file} not found.")
@@ -51,4 +51,5 @@ def apply_migration():
             connection.close()
 
 if __name__ == "__main__":
-    apply_migration()
+    # Usage: python3 apply_migration.py [migrations/<file>.sql]
+    apply_migration(*sys.argv[1:2])
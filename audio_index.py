@@ -0,0 +1,110 @@
+"""
+Index of the label audio files used by Word extraction.
+Each audio folder (static/word_images/images_audio) is listed once into a
+normalized-name -> file map, so matching a label is a dictionary lookup
+instead of probing every name/extension combination with os.path.exists.
+A folder is re-listed only when its mtime changes (files added, removed or
+renamed), and only the names that changed are updated in the map.
+"""
+
+import os
+import re
+import threading
+import time
+import unicodedata
+
+# Preferred first when a label has several audio files
+AUDIO_EXTENSIONS = ["ogg", "mp3", "wav"]
+# Minimum seconds between two mtime checks of a folder
+CHECK_INTERVAL = 2.0
+
+
+def normalize_name(name):
+    """
+    Lookup key of a label or file stem: NFC-normalized with the same cleanup as
+    word_extract.sanitize, so a raw label and its sanitized form share one key
+    """
+    name = unicodedata.normalize("NFC", name)
+    return re.sub(r'[\\/*?:"<>|]', "", name).strip().replace(" ", "_")
+
+
+def _split(filename):
+    """(stem, extension) of an audio file name, or None for other files"""
+    stem, ext = os.path.splitext(filename)
+    ext = ext[1:].lower()
+    if ext not in AUDIO_EXTENSIONS or not stem:
+        return None
+    return stem, ext
+
+
+class AudioIndex:
+    """Normalized label -> audio files per folder, refreshed by folder mtime"""
+
+    def __init__(self):
+        self._folders = {}      # path -> {'mtime', 'checked_at', 'names': set, 'files': {key: [(stem, ext, name)]}}
+        self._lock = threading.Lock()
+
+    def _refresh(self, path):
+        """Return the folder's state, updating it if the folder changed (caller holds the lock)"""
+        now = time.monotonic()
+        state = self._folders.get(path)
+        if state and now - state['checked_at'] < CHECK_INTERVAL:
+            return state
+
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if state is None:
+            state = {'mtime': None, 'checked_at': now, 'names': set(), 'files': {}}
+            self._folders[path] = state
+        state['checked_at'] = now
+        if state['mtime'] == mtime:
+            return state
+
+        names = set()
+        if mtime is not None:
+            with os.scandir(path) as entries:
+                names = {e.name for e in entries if e.is_file()}
+
+        files = state['files']
+        for name in state['names'] - names:
+            parts = _split(name)
+            if parts:
+                key = normalize_name(parts[0])
+                files[key] = [f for f in files[key] if f[2] != name]
+                if not files[key]:
+                    del files[key]
+        for name in names - state['names']:
+            parts = _split(name)
+            if parts:
+                files.setdefault(normalize_name(parts[0]), []).append((parts[0], parts[1], name))
+
+        state['mtime'] = mtime
+        state['names'] = names
+        return state
+
+    def find(self, path, label):
+        """
+        Audio file for a label in folder path as (file name, extension), or None.
+        A file named exactly like the raw label wins over one named like its
+        sanitized form; then ogg, mp3, wav in that order.
+        """
+        if not label:
+            return None
+        with self._lock:
+            candidates = self._refresh(path)['files'].get(normalize_name(label))
+            if not candidates:
+                return None
+            raw = unicodedata.normalize("NFC", label)
+            stem, ext, name = min(candidates, key=lambda f: (
+                unicodedata.normalize("NFC", f[0]) != raw, AUDIO_EXTENSIONS.index(f[1]), f[2]))
+        return name, ext
+
+    def stats(self):
+        with self._lock:
+            return {path: len(state['names']) for path, state in self._folders.items()}
+
+
+# Shared instance used by the Flask app
+audio_index = AudioIndex()
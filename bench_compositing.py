@@ -0,0 +1,71 @@
+"""
+Micro-benchmark for hair-style compositing on 12MP photos.
+
+Compares the original per-channel float64 loop with the vectorized
+float32 and uint16 fixed-point paths in hair_overlay.py.
+
+Usage:
+    python bench_compositing.py --runs 20
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from hair_overlay import alpha_composite, clip_rect
+
+
+def loop_composite(dst, src_bgra, x, y):
+    """Original implementation: float64 alpha and one pass per channel"""
+    alpha_s = src_bgra[:, :, 3] / 255.0
+    alpha_l = 1.0 - alpha_s
+    for c in range(0, 3):
+        rect = clip_rect(dst.shape, src_bgra.shape, x, y)
+        if rect is None:
+            continue
+        (ry, rx), (ay, ax) = rect
+        dst[ry, rx, c] = alpha_s[ay, ax] * src_bgra[ay, ax, c] + alpha_l[ay, ax] * dst[ry, rx, c]
+    return dst
+
+
+def time_it(func, base, hair, x, y, runs):
+    timings = []
+    for _ in range(runs):
+        dst = base.copy()
+        start = time.perf_counter()
+        func(dst, hair, x, y)
+        timings.append(time.perf_counter() - start)
+    return np.array(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hair compositing on 12MP inputs")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--hair-width", type=int, default=1600)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 256, (3000, 4000, 3), dtype=np.uint8)  # 12MP
+    hair = rng.integers(0, 256, (int(args.hair_width * 0.8), args.hair_width, 4), dtype=np.uint8)
+    x, y = 1200, -200  # partly above the top edge, like real placements
+
+    candidates = {
+        "loop float64": loop_composite,
+        "vector float32": lambda d, s, px, py: alpha_composite(d, s, px, py, mode='float32'),
+        "vector fixed u16": lambda d, s, px, py: alpha_composite(d, s, px, py, mode='fixed'),
+    }
+
+    reference = loop_composite(base.copy(), hair, x, y)
+    print(f"12MP base, {hair.shape[1]}x{hair.shape[0]} hair, {args.runs} runs\n")
+    print(f"{'method':<18} {'mean ms':>9} {'p95 ms':>9} {'max diff':>9}")
+    print("-" * 48)
+    for name, func in candidates.items():
+        timings = time_it(func, base, hair, x, y, args.runs)
+        out = func(base.copy(), hair, x, y)
+        max_diff = int(np.abs(out.astype(np.int16) - reference.astype(np.int16)).max())
+        print(f"{name:<18} {timings.mean():>9.1f} {np.percentile(timings, 95):>9.1f} {max_diff:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark proxy face detection against full-resolution analysis.
+
+Analyzes every face photo with DeepFace on the full image, then with proxy
+detection at several long-side sizes, and reports latency together with the
+region error (IoU with the full-resolution region) and gender agreement.
+Images can be upscaled first to mimic large phone uploads.
+
+Usage:
+    python bench_face_proxy.py photos/*.jpg
+    python bench_face_proxy.py uploads/*.jpg --sides 320 480 640 960 --upscale 4000
+"""
+
+import argparse
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from face_analysis import FaceAnalyzer, FACE_DETECTOR_BACKEND
+
+DEFAULT_PATTERNS = [os.path.join("uploads", "*.jpg"), os.path.join("uploads", "*.jpeg"), os.path.join("uploads", "*.png")]
+
+
+def iou(a, b):
+    """Intersection over union of two {'x', 'y', 'w', 'h'} regions"""
+    x1, y1 = max(a['x'], b['x']), max(a['y'], b['y'])
+    x2 = min(a['x'] + a['w'], b['x'] + b['w'])
+    y2 = min(a['y'] + a['h'], b['y'] + b['h'])
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    union = a['w'] * a['h'] + b['w'] * b['h'] - inter
+    return inter / union if union else 0.0
+
+
+def load_corpus(patterns, upscale):
+    corpus = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            img = cv2.imread(path)
+            if img is None:
+                continue
+            if upscale and max(img.shape[:2]) < upscale:
+                scale = upscale / max(img.shape[:2])
+                img = cv2.resize(img, (round(img.shape[1] * scale), round(img.shape[0] * scale)),
+                                 interpolation=cv2.INTER_CUBIC)
+            corpus.append({"name": os.path.basename(path), "img": img})
+    return corpus
+
+
+def run_mode(analyzer, corpus, mode, repeat):
+    rows = []
+    for item in corpus:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            # No cache key, so every call runs inference
+            result = analyzer.analyze(item["img"], mode=mode)
+            times.append(time.perf_counter() - start)
+        rows.append({"name": item["name"], "result": result, "time": min(times)})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark proxy face detection")
+    parser.add_argument("images", nargs="*", help="face photos (default: uploads/*)")
+    parser.add_argument("--sides", nargs="+", type=int, default=[320, 480, 640, 960],
+                        help="proxy long-side sizes to try")
+    parser.add_argument("--upscale", type=int, default=0, help="upscale images to this long side first")
+    parser.add_argument("--detector", default=FACE_DETECTOR_BACKEND)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per image (fastest is kept)")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.images or DEFAULT_PATTERNS, args.upscale)
+    if not corpus:
+        parser.error("no images found")
+    megapixels = np.mean([item["img"].shape[0] * item["img"].shape[1] for item in corpus]) / 1e6
+    print(f"Corpus: {len(corpus)} images, mean {megapixels:.1f} MP, detector {args.detector}")
+
+    full = FaceAnalyzer(detector_backend=args.detector, mode='full')
+    full.load()
+    full.analyze(np.zeros((224, 224, 3), dtype=np.uint8))  # warm-up
+    baseline = run_mode(full, corpus, 'full', args.repeat)
+    reference = {row["name"]: row["result"] for row in baseline}
+
+    results = [("full", baseline)]
+    for side in args.sides:
+        proxy = FaceAnalyzer(detector_backend=args.detector, mode='proxy', proxy_max_side=side)
+        results.append((f"proxy {side}", run_mode(proxy, corpus, 'proxy', args.repeat)))
+
+    print()
+    print(f"{'mode':<12} {'mean ms':>9} {'p95 ms':>9} {'mean IoU':>9} {'min IoU':>8} {'gender':>7}")
+    print("-" * 59)
+    for label, rows in results:
+        times = np.array([row["time"] for row in rows]) * 1000
+        ious = [iou(reference[row["name"]]["region"], row["result"]["region"]) for row in rows]
+        gender = np.mean([reference[row["name"]]["dominant_gender"] == row["result"]["dominant_gender"]
+                          for row in rows])
+        print(f"{label:<12} {times.mean():>9.1f} {np.percentile(times, 95):>9.1f} "
+              f"{np.mean(ious):>9.3f} {min(ious):>8.3f} {gender:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
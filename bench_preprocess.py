@@ -0,0 +1,125 @@
+"""
+Benchmark OCR preprocessing presets.
+
+Runs every image in tests/data plus a synthetic corpus (rendered text, upscaled
+to phone-photo size, slightly rotated and noisy) through each preset and reports
+OCR latency and character-level agreement with the unprocessed baseline.
+For synthetic images the agreement with the ground-truth text is reported too.
+
+Usage:
+    python bench_preprocess.py
+    python bench_preprocess.py --presets none fast document --synthetic 10
+"""
+
+import argparse
+import glob
+import os
+import random
+import time
+from difflib import SequenceMatcher
+
+import cv2
+import numpy as np
+
+from ocr import get_reader, lines_from_results
+from preprocess import PRESETS, preprocess
+
+DATA_DIR = os.path.join("tests", "data")
+
+SAMPLE_LINES = [
+    "INVOICE NO 4821",
+    "Total amount due 1,245.00",
+    "Thank you for shopping",
+    "Mahir Medi tours",
+    "Laravel Maintenance Mode",
+    "php artisan down --retry=60",
+    "Date 2026-02-06 10:56",
+    "Advance Python Learning",
+]
+
+
+def char_agreement(a, b):
+    """Similarity of two texts in [0, 1] at the character level"""
+    if not a and not b:
+        return 1.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def synthetic_image(rng, width=4000):
+    """Render a few lines of known text at phone-photo resolution"""
+    lines = rng.sample(SAMPLE_LINES, 4)
+    canvas = np.full((600, 1000, 3), 235, dtype=np.uint8)
+    for i, line in enumerate(lines):
+        cv2.putText(canvas, line, (40, 110 + i * 130), cv2.FONT_HERSHEY_SIMPLEX, 1.4, (20, 20, 20), 3, cv2.LINE_AA)
+
+    # Upscale, tilt and add sensor noise like a photo of paper
+    scale = width / canvas.shape[1]
+    canvas = cv2.resize(canvas, (width, int(canvas.shape[0] * scale)), interpolation=cv2.INTER_CUBIC)
+    h, w = canvas.shape[:2]
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), rng.uniform(-4, 4), 1.0)
+    canvas = cv2.warpAffine(canvas, matrix, (w, h), borderMode=cv2.BORDER_REPLICATE)
+    noise = np.random.default_rng(rng.randint(0, 2**31)).normal(0, 8, canvas.shape)
+    canvas = np.clip(canvas.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+    return canvas, "\n".join(lines)
+
+
+def load_corpus(synthetic_count, seed):
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(DATA_DIR, "*"))):
+        img = cv2.imread(path)
+        if img is not None:
+            corpus.append({"name": os.path.basename(path), "img": img, "truth": None})
+
+    rng = random.Random(seed)
+    for i in range(synthetic_count):
+        img, truth = synthetic_image(rng)
+        corpus.append({"name": f"synthetic_{i}", "img": img, "truth": truth})
+    return corpus
+
+
+def run_preset(reader, corpus, preset):
+    rows = []
+    for item in corpus:
+        start = time.perf_counter()
+        img = preprocess(item["img"], preset)
+        prep_time = time.perf_counter() - start
+        text = "\n".join(lines_from_results(reader.readtext(img)))
+        total_time = time.perf_counter() - start
+        rows.append({"name": item["name"], "text": text, "prep": prep_time, "total": total_time})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OCR preprocessing presets")
+    parser.add_argument("--presets", nargs="+", default=list(PRESETS), choices=list(PRESETS))
+    parser.add_argument("--synthetic", type=int, default=5, help="number of synthetic images")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.synthetic, args.seed)
+    print(f"Corpus: {len(corpus)} images ({args.synthetic} synthetic)")
+
+    reader = get_reader()
+    reader.readtext(np.zeros((64, 64, 3), dtype=np.uint8))  # warm-up
+
+    presets = args.presets if "none" in args.presets else ["none"] + args.presets
+    results = {preset: run_preset(reader, corpus, preset) for preset in presets}
+    baseline = {row["name"]: row["text"] for row in results["none"]}
+    truth = {item["name"]: item["truth"] for item in corpus}
+
+    print()
+    print(f"{'preset':<10} {'prep ms':>9} {'mean ms':>9} {'p95 ms':>9} {'vs base':>8} {'vs truth':>9}")
+    print("-" * 60)
+    for preset in presets:
+        rows = results[preset]
+        totals = np.array([row["total"] for row in rows]) * 1000
+        prep = np.mean([row["prep"] for row in rows]) * 1000
+        agree = np.mean([char_agreement(baseline[row["name"]], row["text"]) for row in rows])
+        synthetic = [char_agreement(truth[row["name"]], row["text"]) for row in rows if truth[row["name"]]]
+        truth_col = f"{np.mean(synthetic):>9.3f}" if synthetic else f"{'-':>9}"
+        print(f"{preset:<10} {prep:>9.1f} {totals.mean():>9.1f} {np.percentile(totals, 95):>9.1f} "
+              f"{agree:>8.3f} {truth_col}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Benchmark Word (.docx) extraction and persistence.
+
+Generates a large .docx (category markers, labels and one picture per label,
+with matching audio files for part of the labels), extracts it into a
+temporary images folder and reports rows/sec for the whole extraction and how
+many distinct files back the extracted paths (hardlinked blobs), then
+replays the extracted rows through per-row inserts (save_word_data +
+save_word_image) and through the single-transaction bulk insert
+(save_word_document). Inserted rows and temporary files are removed afterwards.
+
+Usage:
+    python bench_word_extract.py
+    python bench_word_extract.py --images 5000 --rounds 10 --keep big.docx
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from xml.sax.saxutils import escape
+
+import cv2
+import numpy as np
+
+from word_extract import AUDIO_FOLDER_NAME, CATEGORIES, extract_word_content
+
+
+def make_png(index, size=32):
+    """Small PNG whose pixels depend on index, so every picture is a distinct part"""
+    img = np.full((size, size, 3), index % 256, dtype=np.uint8)
+    img[0, 0] = (index // 256 % 256, index // 65536 % 256, 255)
+    ok, buf = cv2.imencode(".png", img)
+    return buf.tobytes()
+
+
+CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Default Extension="png" ContentType="image/png"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+</Types>"""
+
+PACKAGE_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+IMAGE_REL = ('<Relationship Id="rId{n}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/image" '
+             'Target="media/image{n}.png"/>')
+
+DRAWING = ('<w:r><w:drawing><wp:inline><wp:extent cx="304800" cy="304800"/><wp:docPr id="{n}" name="Picture {n}"/>'
+           '<a:graphic><a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/picture"><pic:pic>'
+           '<pic:nvPicPr><pic:cNvPr id="{n}" name="image{n}.png"/><pic:cNvPicPr/></pic:nvPicPr>'
+           '<pic:blipFill><a:blip r:embed="rId{n}"/></pic:blipFill><pic:spPr/></pic:pic></a:graphicData></a:graphic>'
+           '</wp:inline></w:drawing></w:r>')
+
+DOCUMENT_NS = ('xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+               'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+               'xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing" '
+               'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+               'xmlns:pic="http://schemas.openxmlformats.org/drawingml/2006/picture"')
+
+
+def text_run(text):
+    return f'<w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r>'
+
+
+def build_document(path, images, rounds=4, labels=50):
+    """
+    Write a .docx with images pictures spread over rounds of alternating categories.
+    The package is written directly with zipfile; adding thousands of pictures
+    through python-docx takes minutes.
+    """
+    per_round = max(1, images // rounds)
+    body, rels = [], []
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as docx:
+        for index in range(images):
+            n = index + 1
+            if index % per_round == 0:
+                marker = CATEGORIES[(index // per_round) % len(CATEGORIES)]
+                body.append(f"<w:p>{text_run(marker)}</w:p>")
+            # Labels repeat, so file name collisions are exercised too
+            body.append(f"<w:p>{text_run(f'label {index % labels}')}{DRAWING.format(n=n)}</w:p>")
+            rels.append(IMAGE_REL.format(n=n))
+            docx.writestr(f"word/media/image{n}.png", make_png(index))
+        docx.writestr("[Content_Types].xml", CONTENT_TYPES)
+        docx.writestr("_rels/.rels", PACKAGE_RELS)
+        docx.writestr("word/_rels/document.xml.rels",
+                      '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                      '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                      + "".join(rels) + "</Relationships>")
+        docx.writestr("word/document.xml",
+                      f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:document {DOCUMENT_NS}>'
+                      f'<w:body>{"".join(body)}</w:body></w:document>')
+
+
+def make_audio(images_folder, labels, every=2):
+    """Audio files for every other label, named like the raw label text"""
+    audio_dir = os.path.join(images_folder, AUDIO_FOLDER_NAME)
+    os.makedirs(audio_dir, exist_ok=True)
+    for index in range(0, labels, every):
+        with open(os.path.join(audio_dir, f"label {index}.ogg"), "wb") as f:
+            f.write(b"OggS" + bytes(64))
+
+
+def disk_usage(folder):
+    """(files, distinct inodes, bytes of distinct inodes) under folder"""
+    files, inodes = 0, {}
+    for dirpath, _, filenames in os.walk(folder):
+        for name in filenames:
+            st = os.stat(os.path.join(dirpath, name))
+            files += 1
+            inodes[(st.st_dev, st.st_ino)] = st.st_size
+    return files, len(inodes), sum(inodes.values())
+
+
+def rate(rows, seconds):
+    return rows / seconds if seconds else 0.0
+
+
+def main():
+    # Imported here so build_document can be used without a database (bench_word_scan.py)
+    from db import save_word_data, save_word_image, save_word_document, get_word_data_by_id
+    from models import WordData
+
+    parser = argparse.ArgumentParser(description="Benchmark Word extraction and persistence")
+    parser.add_argument("--images", type=int, default=2000, help="pictures in the generated document")
+    parser.add_argument("--rounds", type=int, default=4)
+    parser.add_argument("--labels", type=int, default=50, help="distinct labels (repeated across pictures)")
+    parser.add_argument("--keep", help="also save the generated document to this path")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_word_")
+    created = []
+    try:
+        doc_path = os.path.join(workdir, "bench.docx")
+        start = time.perf_counter()
+        build_document(doc_path, args.images, args.rounds, args.labels)
+        print(f"Generated {args.images} pictures in {time.perf_counter() - start:.2f}s "
+              f"({os.path.getsize(doc_path) / 1e6:.1f} MB)")
+        if args.keep:
+            shutil.copy(doc_path, args.keep)
+
+        images_folder = os.path.join(workdir, "word_images")
+        make_audio(images_folder, args.labels)
+
+        start = time.perf_counter()
+        word_id = extract_word_content(doc_path, "bench.docx", images_folder)
+        extract_seconds = time.perf_counter() - start
+        created.append(word_id)
+        files, inodes, nbytes = disk_usage(images_folder)
+        print(f"Files on disk: {files} paths backed by {inodes} distinct files ({nbytes / 1e6:.1f} MB)")
+        rows = get_word_data_by_id(word_id)["images"]
+        for row in rows:
+            row.pop("id")
+
+        start = time.perf_counter()
+        per_row_id = save_word_data("bench.docx", "")
+        created.append(per_row_id)
+        for row in rows:
+            save_word_image(per_row_id, row["image_path"], label=row["label"], category=row["category"],
+                            round_number=row["round_number"], audio_path=row["audio_path"])
+        per_row_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        created.append(save_word_document("bench.docx", "", rows))
+        bulk_seconds = time.perf_counter() - start
+
+        print()
+        print(f"{'step':<28} {'rows':>6} {'seconds':>9} {'rows/sec':>10}")
+        print("-" * 56)
+        for label, seconds in (("extract (files + bulk rows)", extract_seconds),
+                               ("insert per row", per_row_seconds),
+                               ("insert bulk, one txn", bulk_seconds)):
+            print(f"{label:<28} {len(rows):>6} {seconds:>9.3f} {rate(len(rows), seconds):>10.1f}")
+    finally:
+        WordData.objects.filter(id__in=created).delete()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
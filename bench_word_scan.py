@@ -0,0 +1,126 @@
+"""
+Benchmark the .docx image scan of Word extraction.
+
+Generates a document (default 2,000 pictures) and compares the single-pass
+compiled-XPath scan (word_extract.plan_images) with the previous walk over
+doc.paragraphs -> runs -> run.element.iter() with list-based name collision
+checks. Both produce the same plan (folder, file name, label per picture),
+which is verified; no files are written and no database is needed.
+Few distinct labels mean many same-label pictures per folder, the case where
+the old collision check turns quadratic.
+
+Usage:
+    python bench_word_scan.py
+    python bench_word_scan.py --images 5000 --labels 1
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from bench_word_extract import build_document
+from word_extract import CATEGORIES, DEFAULT_CATEGORY, plan_images, sanitize
+
+
+def legacy_plan(doc, rel_map):
+    """The previous extraction walk, reduced to the plan it produced"""
+    from docx.oxml.ns import qn
+
+    current_category = DEFAULT_CATEGORY
+    round_counters = {cat: -1 for cat in CATEGORIES}
+    used_filenames = {}
+    last_text = ""
+    plan = []
+
+    for para in doc.paragraphs:
+        para_text = para.text.strip()
+        for cat in CATEGORIES:
+            if cat in para_text:
+                current_category = cat
+                round_counters[cat] += 1
+                break
+
+        for run in para.runs:
+            run_text = run.text.strip()
+            if run_text and not any(cat in run_text for cat in CATEGORIES):
+                last_text = run_text
+
+            blip_ids = []
+            for el in run.element.iter():
+                if el.tag.endswith('blip'):
+                    embed_id = el.get(qn('r:embed'))
+                    if embed_id:
+                        blip_ids.append(embed_id)
+
+            for blip_id in blip_ids:
+                if blip_id not in rel_map:
+                    continue
+                if round_counters[current_category] == -1:
+                    round_counters[current_category] = 0
+                img_ext = rel_map[blip_id].partname.split('.')[-1]
+                label_name = sanitize(last_text) if last_text else "image"
+                relative_dir = os.path.join(sanitize(current_category), f"round_{round_counters[current_category]}")
+
+                if relative_dir not in used_filenames:
+                    used_filenames[relative_dir] = []
+                final_filename = f"{label_name}.{img_ext}"
+                counter = 1
+                while final_filename in used_filenames[relative_dir]:
+                    final_filename = f"{label_name}_{counter}.{img_ext}"
+                    counter += 1
+                used_filenames[relative_dir].append(final_filename)
+
+                plan.append((relative_dir, final_filename, last_text))
+    return plan
+
+
+def current_plan(doc, rel_map):
+    return [(item["relative_dir"], item["filename"], item["label"]) for item in plan_images(doc, rel_map)]
+
+
+def timed(fn, doc, rel_map, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(doc, rel_map)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    from docx import Document
+
+    parser = argparse.ArgumentParser(description="Benchmark the Word image scan")
+    parser.add_argument("--images", type=int, default=2000, help="pictures in the generated document")
+    parser.add_argument("--rounds", type=int, default=4)
+    parser.add_argument("--labels", type=int, default=5, help="distinct labels (repeated across pictures)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per implementation (fastest is kept)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_word_") as workdir:
+        doc_path = os.path.join(workdir, "bench.docx")
+        build_document(doc_path, args.images, args.rounds, args.labels)
+        doc = Document(doc_path)
+    rel_map = {rel.rId: rel.target_part for rel in doc.part.rels.values() if "image" in rel.target_ref}
+    print(f"Document: {args.images} pictures, {args.rounds} rounds, {args.labels} labels")
+
+    legacy_seconds, legacy = timed(legacy_plan, doc, rel_map, args.repeat)
+    current_seconds, current = timed(current_plan, doc, rel_map, args.repeat)
+    if legacy != current:
+        mismatch = next(i for i, (a, b) in enumerate(zip(legacy, current)) if a != b) \
+            if len(legacy) == len(current) else min(len(legacy), len(current))
+        raise SystemExit(f"Plans differ at picture {mismatch}")
+
+    print()
+    print(f"{'scan':<34} {'pictures':>8} {'ms':>9} {'pictures/sec':>13}")
+    print("-" * 67)
+    for label, seconds in (("paragraphs/runs/iter + list (old)", legacy_seconds),
+                           ("single-pass XPath + set", current_seconds)):
+        print(f"{label:<34} {len(current):>8} {seconds * 1000:>9.1f} {len(current) / seconds:>13.0f}")
+    print(f"\nSpeed-up: {legacy_seconds / current_seconds:.1f}x (plans identical)")
+
+
+if __name__ == "__main__":
+    main()
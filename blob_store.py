@@ -0,0 +1,118 @@
+"""
+Content-addressed storage for uploads.
+Files are stored once per SHA-256 of their bytes at <root>/ab/cd/<sha256>.<ext>,
+so identical uploads share one file and the upload folder stays shallow.
+Reference counts live in the `blobs` table (see db.acquire_blob / db.release_blob);
+this module only deals with the files.
+"""
+
+import errno
+import hashlib
+import os
+import re
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+BLOB_ROOT = "uploads"
+# Threads writing blobs in the background (put_async)
+WRITER_THREADS = 2
+# os.link errors answered by copying instead (cross-device, no hardlink support, link limit)
+LINK_FALLBACK_ERRNOS = (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP)
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_extension(filename, default=".jpg"):
+    """Lower-cased extension of an uploaded filename, restricted to safe characters"""
+    ext = os.path.splitext(filename or "")[1].lower()
+    return ext if re.fullmatch(r"\.[a-z0-9]{1,10}", ext) else default
+
+
+def blob_relpath(digest, ext):
+    """Sharded relative path of a blob: ab/cd/<sha256>.<ext>"""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+
+def _report_write_error(future):
+    if future.exception() is not None:
+        print(f"Blob write failed: {future.exception()}")
+
+
+class BlobStore:
+    """Write-once, content-addressed files under a root folder"""
+
+    def __init__(self, root=BLOB_ROOT):
+        self.root = root
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+    def abspath(self, relpath):
+        return os.path.join(self.root, *relpath.split("/"))
+
+    def describe(self, data, filename):
+        """{'hash', 'path', 'size'} of the blob the bytes would be stored as (path relative to the root)"""
+        digest = content_hash(data)
+        return {"hash": digest, "path": blob_relpath(digest, file_extension(filename)), "size": len(data)}
+
+    def put(self, data, filename):
+        """
+        Store bytes (if not stored yet) and return {'hash', 'path', 'size'},
+        path being relative to the root. Safe to call again with the same bytes.
+        """
+        blob = self.describe(data, filename)
+        self._write(data, blob)
+        return blob
+
+    def put_async(self, data, filename):
+        """Like put(), but the file is written on a background thread; returns (blob, Future)"""
+        blob = self.describe(data, filename)
+        return blob, self.write_async(data, blob)
+
+    def write_async(self, data, blob):
+        """Write the bytes of a described blob (to blob['path']) on a background thread; returns the Future"""
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = ThreadPoolExecutor(max_workers=WRITER_THREADS, thread_name_prefix="blob-writer")
+        future = self._writer.submit(self._write, data, blob)
+        future.add_done_callback(_report_write_error)
+        return future
+
+    def _write(self, data, blob):
+        path = self.abspath(blob["path"])
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a private temp file and rename so readers never see a partial blob
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+    def link(self, relpath, target):
+        """
+        Expose a stored file at target as a hardlink (target must not exist).
+        Falls back to a copy where hardlinks are impossible (another device,
+        or a filesystem without them). Returns True if a hardlink was made.
+        """
+        source = self.abspath(relpath)
+        try:
+            os.link(source, target)
+            return True
+        except OSError as e:
+            if e.errno not in LINK_FALLBACK_ERRNOS:
+                raise
+        shutil.copyfile(source, target)
+        return False
+
+    def unlink(self, relpath):
+        """Remove a stored file (ignores files that are already gone)"""
+        try:
+            os.remove(self.abspath(relpath))
+        except FileNotFoundError:
+            pass
+
+
+# Shared instance used by the Flask app
+blob_store = BlobStore()
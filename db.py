@@ -10,11 +10,15 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_settings')
 django.setup()
 
-from datetime import datetime
-from models import Gallery, Category, User, Role, Student, WordData, WordImage
+import re
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from models import Blob, FileReclaim, Gallery, GalleryOcr, Category, User, Role, Student, WordData, WordImage, WordJob, OcrCache
 from django.core.paginator import Paginator, EmptyPage
 from django.utils import timezone
-from django.db import IntegrityError
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Q
 
 # ... (existing imports)
 
@@ -82,21 +86,69 @@ def init_db():
 
 # ===== GALLERY FUNCTIONS =====
 
-def save_gallery_item(filename, text, timestamp, category_id=1):
-    """Save a gallery item to database using Django ORM"""
+def save_gallery_item(filename, text, timestamp, category_id=1, ocr=None, blob_hash=None):
+    """
+    Save a gallery item (and optionally its packed OCR output) to database using Django ORM.
+    blob_hash links the row to an acquired blob; the reference taken at upload passes to the row.
+    """
     # Convert string timestamp to datetime if needed
     if isinstance(timestamp, str):
         timestamp = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
     
-    gallery_item = Gallery.objects.create(
-        filename=filename,
-        text=text,
-        timestamp=timestamp,
-        category_id=category_id
-    )
+    with transaction.atomic():
+        gallery_item = Gallery.objects.create(
+            filename=filename,
+            text=text,
+            timestamp=timestamp,
+            category_id=category_id,
+            blob_id=blob_hash
+        )
+        if ocr is not None:
+            GalleryOcr.objects.create(gallery_id=gallery_item.id, **ocr)
     return gallery_item.id
 
 
+def save_gallery_items_bulk(items, batch_size=500):
+    """
+    Insert many gallery items (dicts with filename/text/timestamp/category_id and
+    optional packed 'ocr' and 'blob_hash') with bulk INSERTs in one transaction.
+    Returns the new ids in input order.
+    """
+    # MySQL does not return ids from bulk_create and other uploads commit rows concurrently
+    # (READ COMMITTED), so the new rows are found again by a token unique to this call
+    token = uuid.uuid4().hex
+    objs = []
+    for item in items:
+        timestamp = item['timestamp']
+        if isinstance(timestamp, str):
+            timestamp = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
+        objs.append(Gallery(
+            filename=item['filename'],
+            text=item['text'],
+            timestamp=timestamp,
+            category_id=item.get('category_id', 1),
+            blob_id=item.get('blob_hash'),
+            batch_token=token
+        ))
+
+    with transaction.atomic():
+        Gallery.objects.bulk_create(objs, batch_size=batch_size)
+        # Auto-increment ids grow with row order within and across the INSERTs of one session
+        ids = list(Gallery.objects.filter(batch_token=token).order_by('id').values_list('id', flat=True))
+
+        ocr_rows = [GalleryOcr(gallery_id=item_id, **item['ocr'])
+                    for item_id, item in zip(ids, items) if item.get('ocr') is not None]
+        GalleryOcr.objects.bulk_create(ocr_rows, batch_size=batch_size)
+    return ids
+
+
+def get_gallery_ocr(item_id):
+    """Get the packed OCR output of a gallery item, or None"""
+    return GalleryOcr.objects.filter(gallery_id=item_id).values(
+        'num_lines', 'boxes', 'confidences', 'lines'
+    ).first()
+
+
 def get_gallery_items():
     """Get all gallery items using Django ORM"""
     items = Gallery.objects.all().values(
@@ -111,20 +163,336 @@ def get_gallery_items():
     return data
 
 
+# Listing columns; the OCR text is only loaded by get_gallery_item()
+GALLERY_LIST_FIELDS = ('id', 'filename', 'timestamp', 'category_id')
+
+
+def get_gallery_page(before=None, limit=50, category_id=None):
+    """
+    Keyset page of gallery items, newest first, without the text column.
+    before is the last id of the previous page; with category_id the
+    (category_id, id) order of the category_id index is used.
+    Returns {'items', 'next_before'} where next_before is None on the last page.
+    """
+    queryset = Gallery.objects.all()
+    if category_id:
+        queryset = queryset.filter(category_id=category_id)
+    if before:
+        queryset = queryset.filter(id__lt=before)
+    # One extra row tells whether another page exists without a COUNT(*)
+    items = list(queryset.order_by('-id').values(*GALLERY_LIST_FIELDS)[:limit + 1])
+
+    has_more = len(items) > limit
+    items = items[:limit]
+    for item in items:
+        if item['timestamp']:
+            item['timestamp'] = item['timestamp'].strftime("%Y-%m-%d %H:%M:%S")
+    return {'items': items, 'next_before': items[-1]['id'] if has_more else None}
+
+
+def get_gallery_item(item_id):
+    """Get one gallery item including its OCR text, or None"""
+    item = Gallery.objects.filter(id=item_id).values(
+        'id', 'filename', 'text', 'timestamp', 'category_id'
+    ).first()
+    if item and item['timestamp']:
+        item['timestamp'] = item['timestamp'].strftime("%Y-%m-%d %H:%M:%S")
+    return item
+
+
+# MATCH against the FULLTEXT index on gallery.text (see init_db.sql)
+GALLERY_MATCH_SQL = "MATCH(`gallery`.`text`) AGAINST (%s IN BOOLEAN MODE)"
+
+
+def build_fulltext_query(query):
+    """
+    Turn free text into a MySQL boolean-mode query with prefix matching:
+    'recei tot' -> '+recei* +tot*'. Terms shorter than the InnoDB minimum
+    token size (3) are kept optional so they cannot empty the result.
+    """
+    terms = re.findall(r"\w+", query)
+    return " ".join(f"+{term}*" if len(term) >= 3 else f"{term}*" for term in terms)
+
+
+def search_gallery_items(query, category_id=None, page=1, page_size=20):
+    """Ranked full-text search over gallery OCR text using Django ORM and Paginator"""
+    boolean_query = build_fulltext_query(query)
+    if not boolean_query:
+        return {'items': [], 'total': 0}
+
+    queryset = Gallery.objects.extra(
+        select={'score': GALLERY_MATCH_SQL},
+        select_params=(boolean_query,),
+        where=[GALLERY_MATCH_SQL],
+        params=(boolean_query,)
+    )
+    if category_id:
+        queryset = queryset.filter(category_id=category_id)
+    queryset = queryset.order_by('-score', '-id').values(
+        'id', 'filename', 'text', 'timestamp', 'category_id', 'score'
+    )
+    paginator = Paginator(queryset, page_size)
+
+    try:
+        items = list(paginator.page(page).object_list)
+    except EmptyPage:
+        items = []
+
+    for item in items:
+        if item['timestamp']:
+            item['timestamp'] = item['timestamp'].strftime("%Y-%m-%d %H:%M:%S")
+        item['score'] = float(item['score'])
+    return {'items': items, 'total': paginator.count}
+
+
 def get_gallery_count():
     """Get count of gallery items using Django ORM"""
     return Gallery.objects.count()
 
 
-def delete_gallery_item(item_id):
-    """Delete a gallery item by ID using Django ORM"""
+def delete_gallery_items(ids=None, category_id=None, since=None, until=None):
+    """
+    Delete gallery items by ids and/or category and timestamp range (since <= timestamp < until)
+    with one set-based DELETE; gallery_ocr rows go with them (ON DELETE CASCADE).
+    Blob references are dropped in bulk and files no longer used by any item are queued
+    in file_reclaim_queue for the background reclaimer. Returns (deleted, queued_files).
+    """
+    queryset = Gallery.objects.all()
+    if ids is not None:
+        queryset = queryset.filter(id__in=ids)
+    if category_id:
+        queryset = queryset.filter(category_id=category_id)
+    if since:
+        queryset = queryset.filter(timestamp__gte=since)
+    if until:
+        queryset = queryset.filter(timestamp__lt=until)
+
+    with transaction.atomic():
+        # Lock the matching rows and read what they reference
+        rows = list(queryset.select_for_update().values_list('id', 'blob_id', 'filename'))
+        if not rows:
+            return 0, 0
+        row_ids = [row_id for row_id, _, _ in rows]
+
+        refs = {}
+        for _, blob_hash, _ in rows:
+            if blob_hash:
+                refs[blob_hash] = refs.get(blob_hash, 0) + 1
+        queue = []
+        by_count = {}
+        for content_hash, path, refcount in Blob.objects.select_for_update().filter(
+                content_hash__in=refs).values_list('content_hash', 'path', 'refcount'):
+            if refcount <= refs[content_hash]:
+                queue.append(FileReclaim(path=path, content_hash=content_hash))
+            else:
+                by_count.setdefault(refs[content_hash], []).append(content_hash)
+        # One UPDATE per distinct number of dropped references (usually just 1)
+        for count, hashes in by_count.items():
+            Blob.objects.filter(content_hash__in=hashes).update(refcount=F('refcount') - count)
+        if queue:
+            Blob.objects.filter(content_hash__in=[job.content_hash for job in queue])._raw_delete(Blob.objects.db)
+
+        # Flat uploads from before the blob store: only when no remaining item uses the same name
+        legacy = {filename for _, blob_hash, filename in rows if not blob_hash}
+        if legacy:
+            legacy -= set(Gallery.objects.filter(filename__in=legacy).exclude(
+                id__in=row_ids).values_list('filename', flat=True))
+            queue.extend(FileReclaim(path=filename) for filename in sorted(legacy))
+
+        # No per-object delete signals: a single DELETE ... WHERE id IN (...)
+        deleted = Gallery.objects.filter(id__in=row_ids)._raw_delete(Gallery.objects.db)
+        FileReclaim.objects.bulk_create(queue)
+    return deleted, len(queue)
+
+
+# ===== GALLERY EXPORT / IMPORT FUNCTIONS =====
+
+# Columns moved by gallery_io.py (ids are re-assigned on import)
+GALLERY_EXPORT_FIELDS = ('id', 'filename', 'text', 'timestamp', 'category_id', 'blob_id')
+
+
+def iter_gallery_export(chunk_size=1000, category_id=None):
+    """
+    Yield lists of up to chunk_size gallery rows (dicts, oldest first) for export.
+    Chunks are fetched by keyset on id rather than QuerySet.iterator(): on MySQL the
+    driver buffers the whole result of a single query, so one query per chunk keeps
+    memory bounded at chunk_size rows.
+    """
+    queryset = Gallery.objects.all()
+    if category_id:
+        queryset = queryset.filter(category_id=category_id)
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id).order_by('id').values(*GALLERY_EXPORT_FIELDS)[:chunk_size])
+        if not rows:
+            return
+        for row in rows:
+            if row['timestamp']:
+                row['timestamp'] = row['timestamp'].strftime("%Y-%m-%d %H:%M:%S")
+            row['blob_hash'] = row.pop('blob_id')
+        yield rows
+        last_id = rows[-1]['id']
+
+
+def import_gallery_batch(items):
+    """
+    Insert one batch of exported gallery rows with a single bulk_create in a transaction.
+    Rows referencing a known blob take a reference on it; unknown blob hashes are dropped.
+    Returns the number of rows inserted.
+    """
+    objs = []
+    for item in items:
+        timestamp = item.get('timestamp')
+        if isinstance(timestamp, str):
+            timestamp = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
+        objs.append(Gallery(
+            filename=item['filename'],
+            text=item.get('text'),
+            timestamp=timestamp or timezone.now(),
+            category_id=item.get('category_id') or 1,
+            blob_id=item.get('blob_hash')
+        ))
+
+    with transaction.atomic():
+        hashes = {obj.blob_id for obj in objs if obj.blob_id}
+        known = set(Blob.objects.filter(content_hash__in=hashes).values_list('content_hash', flat=True))
+        counts = {}
+        for obj in objs:
+            if obj.blob_id not in known:
+                obj.blob_id = None
+            elif obj.blob_id:
+                counts[obj.blob_id] = counts.get(obj.blob_id, 0) + 1
+        for content_hash, count in counts.items():
+            Blob.objects.filter(content_hash=content_hash).update(refcount=F('refcount') + count)
+        Gallery.objects.bulk_create(objs)
+    return len(objs)
+
+
+# ===== FILE RECLAIM FUNCTIONS =====
+
+# Queue entries are given up on after this many failed unlinks
+RECLAIM_MAX_ATTEMPTS = 5
+
+
+def reclaim_files(unlink, limit=200):
+    """
+    Unlink one batch of queued files with unlink(path) and remove them from the queue.
+    Each blob file is re-checked and unlinked under blob_lock(), which acquire_blob() also
+    takes, so an upload either re-created the row first (the file is kept) or creates it
+    after the unlink (and re-writes the file). Failed unlinks stay queued with one more attempt.
+    Returns (processed, failed) numbers of queue entries.
+    """
+    with transaction.atomic():
+        jobs = list(FileReclaim.objects.select_for_update(skip_locked=True).filter(
+            attempts__lt=RECLAIM_MAX_ATTEMPTS).order_by('id')[:limit])
+        if not jobs:
+            return 0, 0
+        legacy = {job.path for job in jobs if not job.content_hash}
+        live_files = set(Gallery.objects.filter(filename__in=legacy).values_list('filename', flat=True))
+
+        done, failed = [], []
+        for job in jobs:
+            try:
+                if job.content_hash:
+                    with blob_lock(job.content_hash):
+                        # Kept if uploaded again since it was queued
+                        if not Blob.objects.filter(content_hash=job.content_hash).exists():
+                            unlink(job.path)
+                elif job.path not in live_files:
+                    unlink(job.path)
+                done.append(job.id)
+            except OSError as e:
+                print(f"Reclaim of {job.path} failed: {e}")
+                failed.append(job.id)
+
+        if done:
+            FileReclaim.objects.filter(id__in=done)._raw_delete(FileReclaim.objects.db)
+        if failed:
+            FileReclaim.objects.filter(id__in=failed).update(attempts=F('attempts') + 1)
+    return len(jobs), len(failed)
+
+
+# ===== BLOB FUNCTIONS =====
+
+@contextmanager
+def blob_lock(content_hash, timeout=10):
+    """
+    MySQL named lock on one content hash, held by acquire_blob() and reclaim_files().
+    A missing blob row cannot be locked (READ COMMITTED takes no gap locks), so the
+    uploader and the reclaimer serialize on the hash instead.
+    Raises TimeoutError if the lock is not obtained within timeout seconds.
+    """
+    # Lock names are limited to 64 characters; a shared prefix only means an extra wait
+    name = f"blob:{content_hash[:40]}"
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT GET_LOCK(%s, %s)", [name, timeout])
+        if cursor.fetchone()[0] != 1:
+            raise TimeoutError(f"Timed out waiting for lock {name}")
+        try:
+            yield
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", [name])
+
+
+def acquire_blob(blob):
+    """
+    Take one reference on a stored blob ({'hash', 'path', 'size'}), creating its row if needed.
+    Returns the path the blob is stored under: a blob's identity is its hash, so the same
+    bytes uploaded again under another extension keep the first upload's path.
+    """
+    with blob_lock(blob['hash']), transaction.atomic():
+        path = Blob.objects.select_for_update().filter(
+            content_hash=blob['hash']).values_list('path', flat=True).first()
+        if path is not None:
+            Blob.objects.filter(content_hash=blob['hash']).update(refcount=F('refcount') + 1)
+            return path
+        Blob.objects.create(content_hash=blob['hash'], path=blob['path'], size=blob['size'], refcount=1)
+        return blob['path']
+
+
+def release_blob(content_hash, unlink):
+    """
+    Drop one reference on a blob. When it was the last one the row is deleted and
+    unlink(path) is called while the row is still locked, so a concurrent acquire_blob()
+    waits and then re-creates the row (its caller re-writes the file).
+    """
+    with transaction.atomic():
+        blob = Blob.objects.select_for_update().filter(content_hash=content_hash).first()
+        if blob is None:
+            return
+        if blob.refcount > 1:
+            Blob.objects.filter(content_hash=content_hash).update(refcount=F('refcount') - 1)
+            return
+        unlink(blob.path)
+        blob.delete()
+
+
+# ===== OCR CACHE FUNCTIONS =====
+
+def get_ocr_cache(content_hash):
+    """Get cached packed OCR results for a content hash, or None on a miss"""
+    packed = OcrCache.objects.filter(content_hash=content_hash).values(
+        'num_lines', 'boxes', 'confidences', 'lines'
+    ).first()
+    if packed:
+        # BinaryField comes back as memoryview on some drivers
+        packed['boxes'] = bytes(packed['boxes'] or b"")
+        packed['confidences'] = bytes(packed['confidences'] or b"")
+    return packed
+
+
+def save_ocr_cache(content_hash, packed, text):
+    """Store packed OCR results for a content hash"""
     try:
-        item = Gallery.objects.get(id=item_id)
-        filename = item.filename
-        item.delete()
-        return filename
-    except Gallery.DoesNotExist:
-        return None
+        OcrCache.objects.update_or_create(content_hash=content_hash, defaults={'text': text, **packed})
+    except IntegrityError:
+        pass
+
+
+def save_ocr_cache_many(entries):
+    """Store several content_hash -> (packed, text) entries with a single INSERT IGNORE"""
+    objs = [OcrCache(content_hash=key, text=text, **packed) for key, (packed, text) in entries.items()]
+    OcrCache.objects.bulk_create(objs, ignore_conflicts=True)
 
 
 # ===== USER FUNCTIONS =====
@@ -427,6 +795,28 @@ def save_word_image(word_data_id, image_path, label=None, category=None, round_n
     return word_image.id
 
 
+def save_word_document(filename, text_content, images, batch_size=500):
+    """
+    Save a Word document entry and all of its extracted images in one transaction.
+    images are dicts with image_path, label, category, round_number and audio_path.
+    Returns the new word_data id.
+    """
+    with transaction.atomic():
+        word_data = WordData.objects.create(filename=filename, text_content=text_content)
+        WordImage.objects.bulk_create([
+            WordImage(
+                word_data_id=word_data.id,
+                image_path=image['image_path'],
+                label=image.get('label'),
+                category=image.get('category'),
+                round_number=image.get('round_number', 0),
+                audio_path=image.get('audio_path'),
+            )
+            for image in images
+        ], batch_size=batch_size)
+    return word_data.id
+
+
 def get_all_word_data():
     """Get all processed Word document entries using Django ORM"""
     items = WordData.objects.all().prefetch_related('images').values(
@@ -461,3 +851,97 @@ def get_word_data_by_id(item_id):
 def get_word_data_count():
     """Get total count of processed Word documents"""
     return WordData.objects.count()
+
+
+# ===== WORD JOB FUNCTIONS =====
+
+WORD_JOB_FIELDS = ('id', 'filename', 'status', 'total', 'processed', 'category', 'round_number',
+                   'word_data_id', 'error', 'attempts', 'cancel_requested', 'created_at', 'updated_at')
+# Jobs in these states are picked up again after a restart
+WORD_JOB_UNFINISHED = ('queued', 'running')
+
+
+def create_word_job(job_id, filename, file_path):
+    """Save a queued Word extraction job"""
+    WordJob.objects.create(id=job_id, filename=filename, file_path=file_path)
+
+
+def get_word_job(job_id):
+    """A Word extraction job as a dict, or None"""
+    job = WordJob.objects.filter(id=job_id).values(*WORD_JOB_FIELDS, 'file_path').first()
+    if job:
+        for key in ('created_at', 'updated_at'):
+            if job[key]:
+                job[key] = job[key].strftime("%Y-%m-%d %H:%M:%S")
+    return job
+
+
+def get_unfinished_word_jobs():
+    """Ids of queued or interrupted Word jobs, oldest first"""
+    return list(WordJob.objects.filter(status__in=WORD_JOB_UNFINISHED)
+                .order_by('created_at').values_list('id', flat=True))
+
+
+def claim_word_job(job_id, owner, lease_seconds, max_attempts):
+    """
+    Take the lease on a queued job, or on a running one whose owner sent no heartbeat
+    for lease_seconds (its process died), mark it running and count the attempt.
+    Returns False if the job is finished, cancelled, leased by a live worker or has used up its attempts.
+    """
+    expired = timezone.now() - timedelta(seconds=lease_seconds)
+    claimable = Q(status='queued') | Q(status='running') & (Q(heartbeat_at__lt=expired) | Q(heartbeat_at__isnull=True))
+    with transaction.atomic():
+        job = WordJob.objects.select_for_update().filter(claimable, id=job_id).first()
+        if job is None:
+            return False
+        if job.cancel_requested or job.attempts >= max_attempts:
+            job.status = 'cancelled' if job.cancel_requested else 'failed'
+            if not job.cancel_requested:
+                job.error = f"Gave up after {job.attempts} attempts"
+            job.updated_at = timezone.now()
+            job.save(update_fields=['status', 'error', 'updated_at'])
+            return False
+        job.status = 'running'
+        job.attempts += 1
+        job.processed = 0
+        job.owner = owner
+        job.heartbeat_at = job.updated_at = timezone.now()
+        job.save(update_fields=['status', 'attempts', 'processed', 'owner', 'heartbeat_at', 'updated_at'])
+        return True
+
+
+def renew_word_job_leases(job_ids, owner):
+    """Heartbeat: keep the lease on the running jobs this worker owns"""
+    WordJob.objects.filter(id__in=job_ids, owner=owner, status='running').update(heartbeat_at=timezone.now())
+
+
+def update_word_job_progress(job_id, owner, processed, total, category, round_number):
+    """
+    Save a running job's progress (also a heartbeat); returns False if a cancel was
+    requested meanwhile or the lease was taken over by another worker.
+    """
+    now = timezone.now()
+    return WordJob.objects.filter(id=job_id, owner=owner, status='running', cancel_requested=False).update(
+        processed=processed, total=total, category=category, round_number=round_number,
+        heartbeat_at=now, updated_at=now) > 0
+
+
+def finish_word_job(job_id, owner, status, word_data_id=None, error=None):
+    """
+    Record the final status (done, failed or cancelled) of a job; returns False (and
+    changes nothing) if owner lost its lease meanwhile.
+    """
+    return WordJob.objects.filter(id=job_id, owner=owner, status='running').update(
+        status=status, word_data_id=word_data_id, error=error, updated_at=timezone.now()) > 0
+
+
+def cancel_word_job(job_id):
+    """
+    Request cancellation: a queued job is cancelled right away, a running one
+    stops at its next progress update. Returns False if the job is not unfinished.
+    """
+    with transaction.atomic():
+        updated = WordJob.objects.filter(id=job_id, status__in=WORD_JOB_UNFINISHED).update(
+            cancel_requested=True, updated_at=timezone.now())
+        WordJob.objects.filter(id=job_id, status='queued').update(status='cancelled')
+    return updated > 0
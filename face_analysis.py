@@ -0,0 +1,155 @@
+"""
+Face analysis service for the Hair Style flow.
+Keeps the DeepFace detector and gender model resident, works on decoded
+arrays (no second disk read), and caches the dominant gender and face region
+per image content hash with TTL eviction, so repeated style trials on the
+same photo skip inference.
+
+Two analysis modes:
+    full  - DeepFace.analyze on the full-resolution image (detection + gender)
+    proxy - detect on a copy downscaled to PROXY_MAX_SIDE on the long side, map the
+            region back to original coordinates and classify only the face crop
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+
+
+FACE_DETECTOR_BACKEND = os.environ.get('FACE_DETECTOR_BACKEND', 'opencv')
+# Cached analyses expire after this many seconds
+FACE_CACHE_TTL = int(os.environ.get('FACE_CACHE_TTL', 3600))
+FACE_CACHE_SIZE = 256
+# 'full' or 'proxy'
+FACE_ANALYSIS_MODE = os.environ.get('FACE_ANALYSIS_MODE', 'full')
+PROXY_MAX_SIDE = int(os.environ.get('FACE_PROXY_MAX_SIDE', 640))
+MODES = ('full', 'proxy')
+
+
+def scale_region(region, scale, shape):
+    """Map a region found on an image resized by scale back to an image of shape, clipped to its bounds"""
+    height, width = shape[:2]
+    x = min(max(int(round(region['x'] / scale)), 0), width - 1)
+    y = min(max(int(round(region['y'] / scale)), 0), height - 1)
+    w = max(1, min(int(round(region['w'] / scale)), width - x))
+    h = max(1, min(int(round(region['h'] / scale)), height - y))
+    return {'x': x, 'y': y, 'w': w, 'h': h}
+
+
+class FaceAnalyzer:
+    """DeepFace gender + region analysis with a TTL cache keyed by content hash"""
+
+    def __init__(self, detector_backend=FACE_DETECTOR_BACKEND, ttl=FACE_CACHE_TTL, max_size=FACE_CACHE_SIZE,
+                 mode=FACE_ANALYSIS_MODE, proxy_max_side=PROXY_MAX_SIDE):
+        if mode not in MODES:
+            raise ValueError(f"Unknown face analysis mode: {mode}")
+        self.detector_backend = detector_backend
+        self.mode = mode
+        self.proxy_max_side = proxy_max_side
+        self.ttl = ttl
+        self.max_size = max_size
+        self._cache = OrderedDict()     # key -> (expires_at, result)
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    def load(self):
+        """Build the detector and gender models once; DeepFace keeps them in its model cache"""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            from deepface import DeepFace
+            DeepFace.build_model(model_name="Gender", task="facial_attribute")
+            if self.detector_backend != 'skip':
+                DeepFace.build_model(model_name=self.detector_backend, task="face_detector")
+            self._loaded = True
+
+    def _get_cached(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None or entry[0] < now:
+                self._cache.pop(key, None)
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def _put_cached(self, key, result):
+        with self._lock:
+            self._cache[key] = (time.time() + self.ttl, result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+    def _run_full(self, img):
+        """Detect and classify on the full-resolution image"""
+        from deepface import DeepFace
+        objs = DeepFace.analyze(img_path=img, actions=['gender'], enforce_detection=False,
+                                detector_backend=self.detector_backend, silent=True)
+        region = objs[0]['region']
+        return {
+            'dominant_gender': objs[0]['dominant_gender'],
+            'region': {k: int(region[k]) for k in ('x', 'y', 'w', 'h')},
+        }
+
+    def _run_proxy(self, img):
+        """Detect on a downscaled proxy, then classify only the face crop of the original"""
+        from deepface import DeepFace
+        scale = min(1.0, self.proxy_max_side / max(img.shape[:2]))
+        proxy = img
+        if scale < 1.0:
+            proxy = cv2.resize(img, (round(img.shape[1] * scale), round(img.shape[0] * scale)),
+                               interpolation=cv2.INTER_AREA)
+
+        faces = DeepFace.extract_faces(img_path=proxy, detector_backend=self.detector_backend,
+                                       enforce_detection=False, align=False)
+        region = scale_region(faces[0]['facial_area'], scale, img.shape)
+
+        crop = img[region['y']:region['y'] + region['h'], region['x']:region['x'] + region['w']]
+        objs = DeepFace.analyze(img_path=crop, actions=['gender'], enforce_detection=False,
+                                detector_backend='skip', silent=True)
+        return {'dominant_gender': objs[0]['dominant_gender'], 'region': region}
+
+    def _run(self, img, mode):
+        """Run DeepFace on a BGR array and return {'dominant_gender', 'region'}"""
+        self.load()
+        if mode == 'proxy':
+            return self._run_proxy(img)
+        return self._run_full(img)
+
+    def _mode(self, mode):
+        mode = mode or self.mode
+        if mode not in MODES:
+            raise ValueError(f"Unknown face analysis mode: {mode}")
+        return mode
+
+    def analyze(self, img, key=None, mode=None):
+        """Analyze a decoded BGR image; pass key (content hash) to use the cache"""
+        mode = self._mode(mode)
+        if key is not None:
+            key = f"{mode}:{self.detector_backend}:{key}"
+            cached = self._get_cached(key)
+            if cached is not None:
+                return cached
+        result = self._run(img, mode)
+        if key is not None:
+            self._put_cached(key, result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._cache), "ttl": self.ttl,
+                    "mode": self.mode}
+
+
+# Shared instance used by the Flask app
+face_analyzer = FaceAnalyzer()
@@ -0,0 +1,215 @@
+"""
+Streaming gallery export / import.
+
+Export writes gallery rows as NDJSON (one object per line) or as a JSON array
+(the gallery_data.json layout) chunk by chunk, without loading the whole table.
+Import parses either format incrementally and inserts rows in bulk_create
+batches, one transaction per batch, reporting throughput in rows/sec.
+
+Usage:
+    python gallery_io.py export gallery.ndjson
+    python gallery_io.py export gallery_data.json --format json --category-id 1
+    python gallery_io.py import gallery_data.json --batch-size 1000
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+from db import iter_gallery_export, import_gallery_batch
+
+FORMATS = ('ndjson', 'json')
+EXPORT_CHUNK_SIZE = 1000
+IMPORT_BATCH_SIZE = 500
+# Bytes read at a time when parsing a JSON array
+READ_SIZE = 64 * 1024
+SEPARATORS = re.compile(r"[\s,]*")
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Optional fields of an imported row and their JSON types (filename is required)
+ROW_FIELDS = {'text': str, 'timestamp': str, 'category_id': int, 'blob_hash': str}
+MAX_FILENAME_LENGTH = 255
+
+
+def format_for(filename, default='ndjson'):
+    """Pick the format from a file extension (.json -> json, .ndjson/.jsonl -> ndjson)"""
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext == '.json':
+        return 'json'
+    if ext in ('.ndjson', '.jsonl'):
+        return 'ndjson'
+    return default
+
+
+def iter_export(fmt='ndjson', category_id=None, chunk_size=EXPORT_CHUNK_SIZE, stats=None):
+    """Yield the export as text chunks (one per database chunk); stats['rows'] counts rows if given"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt == 'json':
+        yield "["
+    first = True
+    for rows in iter_gallery_export(chunk_size=chunk_size, category_id=category_id):
+        if stats is not None:
+            stats['rows'] = stats.get('rows', 0) + len(rows)
+        if fmt == 'ndjson':
+            yield "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+        else:
+            parts = [json.dumps(row, ensure_ascii=False) for row in rows]
+            yield ("\n" if first else ",\n") + ",\n".join(parts)
+        first = False
+    if fmt == 'json':
+        yield "\n]\n"
+
+
+def iter_ndjson(fp):
+    """Objects of an NDJSON text stream, one line at a time"""
+    for line in fp:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def iter_json_array(fp):
+    """Objects of a JSON array text stream, decoded one element at a time"""
+    decoder = json.JSONDecoder()
+    buffer, pos = "", 0
+    started = eof = False
+    while True:
+        # Skip whitespace (and the opening bracket / separators) before the next element
+        pos = SEPARATORS.match(buffer, pos).end()
+        if pos < len(buffer):
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("Expected a JSON array")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                obj, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                # A number or literal at the end of the buffer may continue in the next chunk
+                if end < len(buffer) or eof or isinstance(obj, (dict, list)):
+                    yield obj
+                    pos = end
+                    continue
+
+        if eof:
+            raise ValueError("Unterminated JSON array" if started else "Expected a JSON array")
+        chunk = fp.read(READ_SIZE)
+        eof = not chunk
+        # Drop what has been consumed before appending
+        buffer, pos = buffer[pos:] + chunk, 0
+
+
+def iter_import(fp, fmt):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown import format: {fmt}")
+    return iter_ndjson(fp) if fmt == 'ndjson' else iter_json_array(fp)
+
+
+def check_row(item, number):
+    """Raise ValueError naming the (1-based) row number if a row cannot be imported"""
+    if not isinstance(item, dict):
+        raise ValueError(f"row {number}: expected an object, got {type(item).__name__}")
+    filename = item.get('filename')
+    if not isinstance(filename, str) or not filename or len(filename) > MAX_FILENAME_LENGTH:
+        raise ValueError(f"row {number}: 'filename' must be a string of 1 to {MAX_FILENAME_LENGTH} characters")
+    for field, kind in ROW_FIELDS.items():
+        value = item.get(field)
+        # bool is an int subclass in Python but not a valid category id
+        if value is not None and (not isinstance(value, kind) or isinstance(value, bool)):
+            raise ValueError(f"row {number}: '{field}' must be {kind.__name__} or null, "
+                             f"got {type(value).__name__}")
+    if item.get('timestamp'):
+        try:
+            datetime.strptime(item['timestamp'], TIMESTAMP_FORMAT)
+        except ValueError:
+            raise ValueError(f"row {number}: 'timestamp' must look like 2026-01-31 23:59:59") from None
+
+
+def import_stream(fp, fmt, batch_size=IMPORT_BATCH_SIZE, progress=None, stats=None):
+    """
+    Import rows from a text stream in bulk_create batches (one transaction each).
+    Every row is checked before its batch is written; a bad row or malformed input raises
+    ValueError, and the batches before it stay imported. progress(stats) is called after
+    every batch; stats, if given, is updated in place (so the caller still has it after an
+    error). Returns the final stats.
+    """
+    start = time.perf_counter()
+    if stats is None:
+        stats = {}
+    stats.update({"rows": 0, "batches": 0, "seconds": 0.0, "rows_per_sec": 0.0})
+
+    def flush(batch):
+        stats["rows"] += import_gallery_batch(batch)
+        stats["batches"] += 1
+        stats["seconds"] = round(time.perf_counter() - start, 3)
+        stats["rows_per_sec"] = round(stats["rows"] / stats["seconds"], 1) if stats["seconds"] else 0.0
+        if progress:
+            progress(stats)
+
+    batch = []
+    for number, item in enumerate(iter_import(fp, fmt), start=1):
+        check_row(item, number)
+        batch.append(item)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    return stats
+
+
+def export_to_file(path, fmt, category_id=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Write an export file and return {'rows', 'seconds', 'rows_per_sec'}"""
+    start = time.perf_counter()
+    stats = {"rows": 0}
+    with open(path, "w", encoding="utf-8") as f:
+        for text in iter_export(fmt, category_id, chunk_size, stats):
+            f.write(text)
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    stats["rows_per_sec"] = round(stats["rows"] / stats["seconds"], 1) if stats["seconds"] else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export / import gallery rows as NDJSON or JSON")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = sub.add_parser("export", help="write gallery rows to a file")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    export_parser.add_argument("--category-id", type=int)
+    export_parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+
+    import_parser = sub.add_parser("import", help="insert gallery rows from a file")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    import_parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format or format_for(args.path)
+    if args.command == "export":
+        stats = export_to_file(args.path, fmt, args.category_id, args.chunk_size)
+        print(f"Exported {stats['rows']} rows to {args.path} in {stats['seconds']}s "
+              f"({stats['rows_per_sec']} rows/sec)")
+    else:
+        def progress(stats):
+            print(f"  {stats['rows']} rows in {stats['batches']} batches, {stats['rows_per_sec']} rows/sec",
+                  file=sys.stderr)
+
+        with open(args.path, "r", encoding="utf-8") as f:
+            stats = import_stream(f, fmt, args.batch_size, progress)
+        print(f"Imported {stats['rows']} rows in {stats['seconds']}s ({stats['rows_per_sec']} rows/sec)")
+
+
+if __name__ == "__main__":
+    main()
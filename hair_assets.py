@@ -0,0 +1,116 @@
+"""
+In-memory cache of the hair-style PNG assets.
+Every PNG under static/hair_assets/{male,female} is decoded once and kept with
+premultiplied alpha; resized copies are memoized per (asset, width) with LRU
+eviction. A folder is re-scanned when any of its files change on disk.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+
+from hair_overlay import composite_premultiplied, hair_placement, premultiply
+
+HAIR_ASSETS_DIR = os.path.join("static", "hair_assets")
+# Max number of resized assets kept in memory
+RESIZED_CACHE_SIZE = int(os.environ.get('HAIR_RESIZED_CACHE_SIZE', 64))
+# Minimum seconds between two on-disk change checks of a folder
+CHECK_INTERVAL = 2.0
+
+
+class HairAssetCache:
+    """Decoded, premultiplied hair assets per folder plus an LRU of resized versions"""
+
+    def __init__(self, root=HAIR_ASSETS_DIR, max_resized=RESIZED_CACHE_SIZE):
+        self.root = root
+        self.max_resized = max_resized
+        self._folders = {}          # folder -> {'signature', 'checked_at', 'assets': {name: premultiplied BGRA}}
+        self._resized = OrderedDict()   # (folder, name, width) -> premultiplied BGRA
+        self._lock = threading.Lock()
+
+    def _signature(self, path):
+        """Names, mtimes and sizes of the PNGs in a folder (None if it does not exist)"""
+        if not os.path.isdir(path):
+            return None
+        with os.scandir(path) as entries:
+            return tuple(sorted(
+                (e.name, e.stat().st_mtime_ns, e.stat().st_size)
+                for e in entries if e.name.endswith('.png') and e.is_file()
+            ))
+
+    def _load_folder(self, folder):
+        """Return the folder's assets, (re)decoding them if they changed on disk (caller holds the lock)"""
+        now = time.monotonic()
+        state = self._folders.get(folder)
+        if state and now - state['checked_at'] < CHECK_INTERVAL:
+            return state['assets']
+
+        path = os.path.join(self.root, folder)
+        signature = self._signature(path)
+        if state and state['signature'] == signature:
+            state['checked_at'] = now
+            return state['assets']
+
+        assets = {}
+        for name, _, _ in signature or ():
+            img = cv2.imread(os.path.join(path, name), cv2.IMREAD_UNCHANGED)
+            if img is None or img.ndim != 3 or img.shape[2] != 4:
+                print(f"DEBUG: Skipping hair asset without alpha: {name}")
+                continue
+            assets[name] = premultiply(img)
+        print(f"DEBUG: Loaded {len(assets)} hair assets from {os.path.abspath(path)}")
+
+        # Drop resized copies of the old versions
+        for key in [k for k in self._resized if k[0] == folder]:
+            del self._resized[key]
+        self._folders[folder] = {'signature': signature, 'checked_at': now, 'assets': assets}
+        return assets
+
+    def names(self, folder):
+        """Sorted asset names available in a folder"""
+        with self._lock:
+            return sorted(self._load_folder(folder))
+
+    def get(self, folder, name):
+        """Premultiplied BGRA asset at its original size, or None"""
+        with self._lock:
+            return self._load_folder(folder).get(name)
+
+    def resized(self, folder, name, width):
+        """Premultiplied BGRA asset scaled to width (aspect ratio kept), memoized with LRU eviction"""
+        key = (folder, name, width)
+        with self._lock:
+            asset = self._load_folder(folder).get(name)
+            if asset is None:
+                return None
+            if key in self._resized:
+                self._resized.move_to_end(key)
+                return self._resized[key]
+
+        height = int(width * asset.shape[0] / asset.shape[1])
+        # Premultiplied colour can be interpolated directly without dark fringes
+        scaled = cv2.resize(asset, (width, height))
+
+        with self._lock:
+            self._resized[key] = scaled
+            while len(self._resized) > self.max_resized:
+                self._resized.popitem(last=False)
+        return scaled
+
+    def apply(self, img, folder, name, face_region):
+        """Place a cached asset on the face region of img, in place. Returns False if the asset is missing"""
+        asset = self.get(folder, name)
+        if asset is None:
+            return False
+        target_width, target_height, hair_x, hair_y = hair_placement(face_region, asset.shape)
+        if target_width <= 0 or target_height <= 0:
+            return True
+        composite_premultiplied(img, self.resized(folder, name, target_width), hair_x, hair_y)
+        return True
+
+
+# Shared instance used by the Flask app
+hair_assets = HairAssetCache()
@@ -0,0 +1,130 @@
+"""
+Hair-style overlay helpers.
+Places a BGRA hair asset above a detected face and alpha-composites it onto
+the photo in one vectorized pass over all colour channels.
+"""
+
+import cv2
+import numpy as np
+
+# Hair width relative to face width, and how far the hair is lifted above the face box
+HAIR_SCALE_FACTOR = 1.3
+HAIR_LIFT = 0.45
+
+
+def hair_placement(face_region, asset_shape, scale_factor=HAIR_SCALE_FACTOR):
+    """
+    Size and top-left position of the hair for a face region ({'x', 'y', 'w', 'h'}).
+    Returns (target_width, target_height, hair_x, hair_y).
+    """
+    fx, fy, fw = face_region['x'], face_region['y'], face_region['w']
+    target_width = int(fw * scale_factor)
+    aspect_ratio = asset_shape[0] / asset_shape[1]
+    target_height = int(target_width * aspect_ratio)
+
+    # Centered on the face horizontally, shifted up so the hair sits on top of the head
+    face_center_x = fx + fw // 2
+    hair_x = face_center_x - target_width // 2
+    hair_y = fy - int(target_height * HAIR_LIFT)
+    return target_width, target_height, hair_x, hair_y
+
+
+def clip_rect(dst_shape, src_shape, x, y):
+    """
+    Clip a src image placed at (x, y) to the dst bounds.
+    Returns (dst_slices, src_slices) or None when they do not overlap.
+    """
+    h, w = src_shape[:2]
+    r_y1, r_y2 = max(0, y), min(dst_shape[0], y + h)
+    r_x1, r_x2 = max(0, x), min(dst_shape[1], x + w)
+    if r_y2 <= r_y1 or r_x2 <= r_x1:
+        return None
+
+    # asset offsets if cropped
+    a_y1, a_x1 = max(0, -y), max(0, -x)
+    dst = (slice(r_y1, r_y2), slice(r_x1, r_x2))
+    src = (slice(a_y1, a_y1 + (r_y2 - r_y1)), slice(a_x1, a_x1 + (r_x2 - r_x1)))
+    return dst, src
+
+
+def alpha_composite(dst, src_bgra, x, y, mode='fixed'):
+    """
+    Composite a BGRA image onto a BGR image in place at (x, y), clipping to bounds.
+    mode='fixed' uses uint16 fixed-point arithmetic (rounded),
+    mode='float32' uses float32 (truncated, like the original per-channel loop).
+    """
+    rect = clip_rect(dst.shape, src_bgra.shape, x, y)
+    if rect is None:
+        return dst
+    dst_sl, src_sl = rect
+    roi = dst[dst_sl]
+    src = src_bgra[src_sl]
+
+    if mode == 'fixed':
+        alpha = src[:, :, 3:4].astype(np.uint16)
+        blended = src[:, :, :3].astype(np.uint16)
+        blended *= alpha
+        background = roi.astype(np.uint16)
+        background *= 255 - alpha
+        blended += background
+        # Exact rounded division by 255 for values up to 255 * 255
+        blended += 128
+        blended += blended >> 8
+        blended >>= 8
+        roi[...] = blended
+    elif mode == 'float32':
+        alpha = src[:, :, 3:4].astype(np.float32)
+        alpha *= np.float32(1 / 255.0)
+        blended = src[:, :, :3].astype(np.float32)
+        blended *= alpha
+        background = roi.astype(np.float32)
+        background *= 1.0 - alpha
+        blended += background
+        roi[...] = blended
+    else:
+        raise ValueError(f"Unknown composite mode: {mode}")
+    return dst
+
+
+def premultiply(src_bgra):
+    """Return a copy of a BGRA image with colour premultiplied by alpha (rounded)"""
+    out = src_bgra.copy()
+    alpha = src_bgra[:, :, 3:4].astype(np.uint16)
+    color = src_bgra[:, :, :3].astype(np.uint16)
+    color *= alpha
+    color += 128
+    color += color >> 8
+    color >>= 8
+    out[:, :, :3] = color
+    return out
+
+
+def composite_premultiplied(dst, src_premul, x, y):
+    """
+    Composite a premultiplied BGRA image onto a BGR image in place at (x, y):
+    dst = src + dst * (255 - alpha) / 255, in uint16 fixed point.
+    """
+    rect = clip_rect(dst.shape, src_premul.shape, x, y)
+    if rect is None:
+        return dst
+    dst_sl, src_sl = rect
+    roi = dst[dst_sl]
+    src = src_premul[src_sl]
+
+    blended = roi.astype(np.uint16)
+    blended *= 255 - src[:, :, 3:4].astype(np.uint16)
+    blended += 128
+    blended += blended >> 8
+    blended >>= 8
+    blended += src[:, :, :3]
+    roi[...] = blended
+    return dst
+
+
+def apply_hair(img, hair_img, face_region, mode='fixed'):
+    """Resize the hair asset to the face and composite it onto img in place"""
+    target_width, target_height, hair_x, hair_y = hair_placement(face_region, hair_img.shape)
+    if target_width <= 0 or target_height <= 0:
+        return img
+    hair_resized = cv2.resize(hair_img, (target_width, target_height))
+    return alpha_composite(img, hair_resized, hair_x, hair_y, mode)
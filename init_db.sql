@@ -70,6 +70,33 @@ CREATE TABLE IF NOT EXISTS `students` (
   UNIQUE KEY `email` (`email`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- ----------------------------
+-- Table structure for blobs
+-- Uploads stored once per content hash at uploads/ab/cd/<sha256>.<ext>;
+-- refcount is the number of gallery rows (or uploads in progress) using the file
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `blobs` (
+  `content_hash` char(64) NOT NULL,
+  `path` varchar(255) NOT NULL,
+  `size` bigint(20) NOT NULL DEFAULT '0',
+  `refcount` int(11) NOT NULL DEFAULT '0',
+  `created_at` datetime DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`content_hash`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- ----------------------------
+-- Table structure for file_reclaim_queue
+-- Files of deleted gallery items, unlinked in batches by the background reclaimer
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `file_reclaim_queue` (
+  `id` int(11) NOT NULL AUTO_INCREMENT,
+  `path` varchar(255) NOT NULL,
+  `content_hash` char(64) DEFAULT NULL,
+  `attempts` int(11) NOT NULL DEFAULT '0',
+  `created_at` datetime DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
 -- ----------------------------
 -- Table structure for gallery
 -- ----------------------------
@@ -79,8 +106,13 @@ CREATE TABLE IF NOT EXISTS `gallery` (
   `text` text,
   `timestamp` datetime NOT NULL,
   `category_id` int(11) NOT NULL DEFAULT '1',
+  `blob_hash` char(64) DEFAULT NULL,
+  `batch_token` char(32) DEFAULT NULL,
   PRIMARY KEY (`id`),
   KEY `category_id` (`category_id`),
+  KEY `blob_hash` (`blob_hash`),
+  KEY `batch_token` (`batch_token`),
+  FULLTEXT KEY `text_fulltext` (`text`),
   CONSTRAINT `gallery_ibfk_1` FOREIGN KEY (`category_id`) REFERENCES `categories` (`id`) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
@@ -111,4 +143,58 @@ CREATE TABLE IF NOT EXISTS `word_images` (
   CONSTRAINT `word_images_ibfk_1` FOREIGN KEY (`word_data_id`) REFERENCES `word_data` (`id`) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- ----------------------------
+-- Table structure for word_jobs
+-- Background Word extraction jobs (word_jobs.py); unfinished jobs are resumed at startup
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `word_jobs` (
+  `id` char(32) NOT NULL,
+  `filename` varchar(255) NOT NULL,
+  `file_path` varchar(255) NOT NULL,
+  `status` varchar(20) NOT NULL DEFAULT 'queued',
+  `total` int(11) NOT NULL DEFAULT '0',
+  `processed` int(11) NOT NULL DEFAULT '0',
+  `category` varchar(100) DEFAULT NULL,
+  `round_number` int(11) DEFAULT NULL,
+  `word_data_id` int(11) DEFAULT NULL,
+  `error` text,
+  `attempts` int(11) NOT NULL DEFAULT '0',
+  `cancel_requested` tinyint(1) NOT NULL DEFAULT '0',
+  `owner` varchar(100) DEFAULT NULL,
+  `heartbeat_at` datetime DEFAULT NULL,
+  `created_at` datetime DEFAULT CURRENT_TIMESTAMP,
+  `updated_at` datetime DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`),
+  KEY `status` (`status`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- ----------------------------
+-- Table structure for ocr_cache
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `ocr_cache` (
+  `content_hash` char(64) NOT NULL,
+  `text` mediumtext,
+  `num_lines` int(11) NOT NULL DEFAULT '0',
+  `boxes` mediumblob,
+  `confidences` blob,
+  `lines` mediumtext,
+  `created_at` datetime DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`content_hash`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- ----------------------------
+-- Table structure for gallery_ocr
+-- Full readtext() output per gallery item: boxes are packed float32 (n x 4 x 2),
+-- confidences packed float32 (n), lines a JSON list of texts
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `gallery_ocr` (
+  `gallery_id` int(11) NOT NULL,
+  `num_lines` int(11) NOT NULL DEFAULT '0',
+  `boxes` mediumblob,
+  `confidences` blob,
+  `lines` mediumtext,
+  PRIMARY KEY (`gallery_id`),
+  CONSTRAINT `gallery_ocr_ibfk_1` FOREIGN KEY (`gallery_id`) REFERENCES `gallery` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
 SET FOREIGN_KEY_CHECKS = 1;
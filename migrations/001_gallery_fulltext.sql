@@ -0,0 +1,5 @@
+-- Full-text index for gallery search (/api/gallery/search).
+-- init_db.sql already creates it for new databases; run this once on existing ones:
+--   python3 apply_migration.py migrations/001_gallery_fulltext.sql
+
+ALTER TABLE `gallery` ADD FULLTEXT KEY `text_fulltext` (`text`);
@@ -0,0 +1,9 @@
+-- Content-addressed upload storage (blob_store.py).
+-- The blobs table itself is created by init_db.sql (CREATE TABLE IF NOT EXISTS):
+--   python3 apply_migration.py init_db.sql
+--   python3 apply_migration.py migrations/003_blob_store.sql
+-- Existing gallery rows keep blob_hash NULL and their flat uploads/<filename> file.
+
+ALTER TABLE `gallery`
+  ADD COLUMN `blob_hash` char(64) DEFAULT NULL AFTER `category_id`,
+  ADD KEY `blob_hash` (`blob_hash`);
@@ -0,0 +1,25 @@
+-- Background Word extraction jobs (word_jobs.py).
+-- The word_jobs table is created by init_db.sql (CREATE TABLE IF NOT EXISTS):
+--   python3 apply_migration.py init_db.sql
+-- This file only needs to run on databases that are set up without init_db.sql.
+
+CREATE TABLE IF NOT EXISTS `word_jobs` (
+  `id` char(32) NOT NULL,
+  `filename` varchar(255) NOT NULL,
+  `file_path` varchar(255) NOT NULL,
+  `status` varchar(20) NOT NULL DEFAULT 'queued',
+  `total` int(11) NOT NULL DEFAULT '0',
+  `processed` int(11) NOT NULL DEFAULT '0',
+  `category` varchar(100) DEFAULT NULL,
+  `round_number` int(11) DEFAULT NULL,
+  `word_data_id` int(11) DEFAULT NULL,
+  `error` text,
+  `attempts` int(11) NOT NULL DEFAULT '0',
+  `cancel_requested` tinyint(1) NOT NULL DEFAULT '0',
+  `owner` varchar(100) DEFAULT NULL,
+  `heartbeat_at` datetime DEFAULT NULL,
+  `created_at` datetime DEFAULT CURRENT_TIMESTAMP,
+  `updated_at` datetime DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`),
+  KEY `status` (`status`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,8 @@
+-- Batch uploads insert their gallery rows with one bulk INSERT and find the new ids
+-- again by a per-batch token (db.save_gallery_items_bulk).
+-- New databases get the column from init_db.sql; existing ones run:
+--   python3 apply_migration.py migrations/005_gallery_batch_token.sql
+
+ALTER TABLE `gallery`
+  ADD COLUMN `batch_token` char(32) DEFAULT NULL AFTER `blob_hash`,
+  ADD KEY `batch_token` (`batch_token`);
@@ -36,6 +36,41 @@ class Role(models.Model):
         return self.name
 
 
+class Blob(models.Model):
+    """Content-addressed upload stored once at uploads/ab/cd/<sha256>.<ext>, with a reference count"""
+    content_hash = models.CharField(max_length=64, primary_key=True)
+    path = models.CharField(max_length=255)
+    size = models.BigIntegerField(default=0)
+    refcount = models.IntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        app_label = 'myapp'
+        db_table = 'blobs'
+        managed = False
+
+    def __str__(self):
+        return f"Blob {self.content_hash[:12]} ({self.refcount} refs)"
+
+
+class FileReclaim(models.Model):
+    """Upload file waiting to be unlinked by the background reclaimer (reclaimer.py)"""
+    id = models.AutoField(primary_key=True)
+    path = models.CharField(max_length=255)
+    # Blob the file belonged to (NULL for flat uploads saved before the blob store)
+    content_hash = models.CharField(max_length=64, null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        app_label = 'myapp'
+        db_table = 'file_reclaim_queue'
+        managed = False
+
+    def __str__(self):
+        return f"FileReclaim #{self.id} - {self.path}"
+
+
 class Gallery(models.Model):
     """Gallery model for uploaded images and OCR results"""
     id = models.AutoField(primary_key=True)
@@ -48,6 +83,17 @@ class Gallery(models.Model):
         db_column='category_id',
         default=1
     )
+    # Stored upload (NULL for items saved before the blob store)
+    blob = models.ForeignKey(
+        Blob,
+        on_delete=models.DO_NOTHING,
+        db_column='blob_hash',
+        db_constraint=False,
+        null=True,
+        blank=True
+    )
+    # Set on rows inserted together by save_gallery_items_bulk, to find their ids again
+    batch_token = models.CharField(max_length=32, null=True, blank=True)
 
     class Meta:
         app_label = 'myapp'
@@ -144,3 +190,77 @@ class WordImage(models.Model):
 
     def __str__(self):
         return f"WordImage #{self.id} - {self.image_path}"
+
+
+class WordJob(models.Model):
+    """Background Word extraction job (word_jobs.py) with its progress"""
+    id = models.CharField(max_length=32, primary_key=True)
+    filename = models.CharField(max_length=255)
+    # Uploaded .docx kept until the job finishes, so it can be resumed after a restart
+    file_path = models.CharField(max_length=255)
+    # queued, running, done, failed or cancelled
+    status = models.CharField(max_length=20, default='queued')
+    total = models.IntegerField(default=0)
+    processed = models.IntegerField(default=0)
+    category = models.CharField(max_length=100, null=True, blank=True)
+    round_number = models.IntegerField(null=True, blank=True)
+    word_data_id = models.IntegerField(null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    cancel_requested = models.BooleanField(default=False)
+    # Lease of the worker running the job: a running job whose heartbeat is older than
+    # word_jobs.WORD_JOB_LEASE_SECONDS belongs to a dead process and may be taken over
+    owner = models.CharField(max_length=100, null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        app_label = 'myapp'
+        db_table = 'word_jobs'
+        managed = False
+
+    def __str__(self):
+        return f"WordJob {self.id} - {self.filename} ({self.status})"
+
+
+class OcrCache(models.Model):
+    """Model to store OCR results keyed by a hash of the image bytes and OCR settings"""
+    content_hash = models.CharField(max_length=64, primary_key=True)
+    text = models.TextField(null=True, blank=True)
+    num_lines = models.IntegerField(default=0)
+    boxes = models.BinaryField(null=True, blank=True)
+    confidences = models.BinaryField(null=True, blank=True)
+    lines = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        app_label = 'myapp'
+        db_table = 'ocr_cache'
+        managed = False
+
+    def __str__(self):
+        return f"OcrCache {self.content_hash[:12]}"
+
+
+class GalleryOcr(models.Model):
+    """Model to store the full OCR output (packed boxes and confidences) of a gallery item"""
+    gallery = models.OneToOneField(
+        Gallery,
+        on_delete=models.CASCADE,
+        db_column='gallery_id',
+        primary_key=True,
+        related_name='ocr'
+    )
+    num_lines = models.IntegerField(default=0)
+    boxes = models.BinaryField(null=True, blank=True)
+    confidences = models.BinaryField(null=True, blank=True)
+    lines = models.TextField(null=True, blank=True)
+
+    class Meta:
+        app_label = 'myapp'
+        db_table = 'gallery_ocr'
+        managed = False
+
+    def __str__(self):
+        return f"GalleryOcr #{self.gallery_id} ({self.num_lines} lines)"
@@ -0,0 +1,95 @@
+"""
+EasyOCR helpers shared by the Flask app and the OCR worker processes.
+Kept free of Flask/Django imports so worker processes can load it cheaply.
+"""
+
+import json
+import os
+
+import numpy as np
+
+# Suppress TensorFlow warning
+os.environ.setdefault('TF_ENABLE_ONEDNN_OPTS', '0')
+
+import easyocr
+from easyocr.utils import reformat_input
+
+from preprocess import map_to_original
+
+# OCR settings
+OCR_LANGUAGES = ['en']
+OCR_MIN_CONFIDENCE = 0.4
+
+# reader = easyocr.Reader(['en']) # Lazy load this
+reader = None
+
+
+def get_reader():
+    """Return the process-wide EasyOCR reader, creating it on first use"""
+    global reader
+    if reader is None:
+        print("Lazy loading EasyOCR...")
+        reader = easyocr.Reader(OCR_LANGUAGES)
+    return reader
+
+
+def lines_from_results(results, min_confidence=OCR_MIN_CONFIDENCE):
+    """Keep the text of every readtext() result above the confidence filter"""
+    lines = []
+    for (bbox, detected_text, prob) in results:
+        if prob > min_confidence:  # confidence filter
+            lines.append(detected_text)
+    return lines
+
+
+def pack_results(results, matrix=None):
+    """
+    Store the full readtext() output in a compact columnar form:
+    boxes as float32 (n, 4, 2) bytes, confidences as float32 (n,) bytes, texts as a JSON list.
+    matrix is the preprocessing transform (see preprocess.preprocess_mapped); boxes are
+    mapped back through it (resize and deskew rotation) to original image coordinates.
+    """
+    boxes = np.array([bbox for bbox, _, _ in results], dtype=np.float32).reshape(-1, 4, 2)
+    if matrix is not None:
+        boxes = map_to_original(boxes, matrix)
+    confidences = np.array([prob for _, _, prob in results], dtype=np.float32)
+    return {
+        "num_lines": len(results),
+        "boxes": boxes.tobytes(),
+        "confidences": confidences.tobytes(),
+        "lines": json.dumps([detected_text for _, detected_text, _ in results]),
+    }
+
+
+def unpack_results(packed):
+    """Inverse of pack_results(): (boxes (n, 4, 2), confidences (n,), texts)"""
+    boxes = np.frombuffer(packed["boxes"] or b"", dtype=np.float32).reshape(-1, 4, 2)
+    confidences = np.frombuffer(packed["confidences"] or b"", dtype=np.float32)
+    return boxes, confidences, json.loads(packed["lines"] or "[]")
+
+
+def packed_text(packed, min_confidence=OCR_MIN_CONFIDENCE):
+    """Re-derive the combined text from packed results at any confidence threshold"""
+    _, confidences, texts = unpack_results(packed)
+    return "\n".join(t for t, keep in zip(texts, confidences > min_confidence) if keep)
+
+
+def read_packed(img, matrix=None):
+    """Run EasyOCR on a decoded image and return the packed results"""
+    return pack_results(get_reader().readtext(img), matrix)
+
+
+def iter_readtext(img, chunk_size=4):
+    """
+    Like reader.readtext(img), but yields (bbox, text, prob) as soon as each
+    small group of detected boxes is recognised instead of after the whole image.
+    """
+    reader_instance = get_reader()
+    img, img_cv_grey = reformat_input(img)
+    horizontal_list, free_list = reader_instance.detect(img)
+    horizontal_list, free_list = horizontal_list[0], free_list[0]
+
+    for i in range(0, len(horizontal_list), chunk_size):
+        yield from reader_instance.recognize(img_cv_grey, horizontal_list[i:i + chunk_size], [])
+    for i in range(0, len(free_list), chunk_size):
+        yield from reader_instance.recognize(img_cv_grey, [], free_list[i:i + chunk_size])
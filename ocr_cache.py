@@ -0,0 +1,95 @@
+"""
+Content-addressed OCR result cache.
+Stores the packed readtext() output (see ocr.pack_results) so a hit can also
+fill gallery_ocr. A bounded in-process LRU sits in front of the ocr_cache table,
+so re-uploading the same image skips EasyOCR entirely.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from db import get_ocr_cache, save_ocr_cache, save_ocr_cache_many
+from ocr import OCR_LANGUAGES, OCR_MIN_CONFIDENCE, packed_text
+from preprocess import DEFAULT_PRESET
+
+# Max number of results kept in memory
+OCR_CACHE_SIZE = int(os.environ.get('OCR_CACHE_SIZE', 512))
+
+
+def cache_key(data, preset=DEFAULT_PRESET, languages=OCR_LANGUAGES, min_confidence=OCR_MIN_CONFIDENCE):
+    """Hash the uploaded bytes together with the OCR settings that affect the text"""
+    h = hashlib.sha256(data)
+    h.update(f"|lang={','.join(languages)}|conf={min_confidence}|pre={preset}".encode())
+    return h.hexdigest()
+
+
+class OcrResultCache:
+    """LRU of content_hash -> packed OCR results backed by the database"""
+
+    def __init__(self, max_size=OCR_CACHE_SIZE):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def _remember(self, key, packed):
+        """Insert into the LRU (caller holds the lock)"""
+        self._items[key] = packed
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def get(self, key):
+        """Return cached packed results for key, or None on a miss"""
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.memory_hits += 1
+                return self._items[key]
+
+        packed = get_ocr_cache(key)
+
+        with self._lock:
+            if packed is None:
+                self.misses += 1
+                return None
+            self.db_hits += 1
+            self._remember(key, packed)
+        return packed
+
+    def put(self, key, packed):
+        """Store packed results in memory and in the database"""
+        with self._lock:
+            self._remember(key, packed)
+        save_ocr_cache(key, packed, packed_text(packed))
+
+    def put_many(self, entries):
+        """Store a dict of key -> packed results with one database round trip"""
+        if not entries:
+            return
+        with self._lock:
+            for key, packed in entries.items():
+                self._remember(key, packed)
+        save_ocr_cache_many({key: (packed, packed_text(packed)) for key, packed in entries.items()})
+
+    def stats(self):
+        with self._lock:
+            hits = self.memory_hits + self.db_hits
+            total = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / total, 4) if total else 0.0,
+                "size": len(self._items),
+                "max_size": self.max_size,
+            }
+
+
+# Shared instance used by the Flask app
+ocr_cache = OcrResultCache()
@@ -0,0 +1,289 @@
+"""
+Background OCR job queue backed by a process pool.
+Each worker process loads its own EasyOCR reader once (pool initializer),
+so a request thread only submits work and never runs inference itself.
+Images can be submitted as a file path, as the uploaded bytes (decoded in the
+worker, no disk round trip) or as an already decoded array.
+Workers are spawned (not forked from the threaded app process), and a pool that
+lost a worker (BrokenProcessPool) is replaced by a fresh one.
+stream_ocr() also runs on the pool and hands recognised lines back one by one
+through a multiprocessing.Manager queue.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import cv2
+import numpy as np
+
+import ocr
+from preprocess import decode_image, preprocess_mapped, map_to_original, DEFAULT_PRESET
+
+# Number of OCR worker processes (each one holds a full EasyOCR model in memory)
+OCR_WORKERS = int(os.environ.get('OCR_WORKERS', 2))
+# Finished jobs are forgotten after this many seconds
+JOB_TTL_SECONDS = 3600
+# Seconds warm_up() waits for every worker to load its reader
+WARMUP_TIMEOUT = 600
+# Threads running job completions (on_success / on_failure, i.e. database writes)
+COMPLETION_WORKERS = 2
+
+# Forking a process that runs Flask threads can copy locks held by another thread
+_mp_context = multiprocessing.get_context("spawn")
+
+_executor = None
+_executor_lock = threading.Lock()
+_manager = None     # serves the line queues of stream_ocr()
+_completion = None  # ThreadPoolExecutor for _finish_job
+
+_jobs = {}      # job_id -> job dict (status, result, error, timings)
+_futures = {}   # job_id -> Future
+_jobs_lock = threading.Lock()
+
+
+# ===== WORKER SIDE =====
+
+def _init_worker():
+    """Pool initializer: load the reader once per worker process and run a dummy inference"""
+    ocr.get_reader().readtext(np.zeros((32, 32, 3), dtype=np.uint8))
+
+
+def _ping(barrier):
+    """
+    Warm-up task. A worker only runs tasks once its initializer finished; the barrier holds
+    each worker on its ping until every worker has one, so no worker can take two.
+    """
+    barrier.wait()
+    return os.getpid()
+
+
+def _ocr_image(img, preset):
+    """Worker task: preprocess and OCR a decoded image, return the packed results"""
+    processed, matrix = preprocess_mapped(img, preset)
+    return ocr.read_packed(processed, matrix)
+
+
+def _run_ocr(path, preset):
+    """Worker task: OCR an image file"""
+    img = cv2.imread(path)
+    if img is None:
+        raise ValueError(f"Could not read image: {os.path.basename(path)}")
+    return _ocr_image(img, preset)
+
+
+def _run_ocr_bytes(data, preset):
+    """Worker task: OCR encoded image bytes, decoded in memory"""
+    return _ocr_image(decode_image(data), preset)
+
+
+def _stream_ocr_bytes(data, preset, lines):
+    """
+    Worker task: OCR encoded image bytes and put each line on the lines queue as soon as it is
+    recognised, as (bbox in original image coordinates, text, confidence); returns the packed results
+    """
+    img = decode_image(data)
+    processed, matrix = preprocess_mapped(img, preset)
+    results = []
+    for bbox, detected_text, prob in ocr.iter_readtext(processed):
+        results.append((bbox, detected_text, prob))
+        lines.put((map_to_original(bbox, matrix).tolist(), detected_text, float(prob)))
+    return ocr.pack_results(results, matrix)
+
+
+# ===== PARENT SIDE =====
+
+def get_executor():
+    """Return the shared process pool, creating it on first use"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                print(f"Starting OCR worker pool ({OCR_WORKERS} workers)...")
+                _executor = ProcessPoolExecutor(max_workers=OCR_WORKERS, mp_context=_mp_context,
+                                                initializer=_init_worker)
+    return _executor
+
+
+def _discard_executor(broken):
+    """Drop a pool that lost a worker (e.g. killed for memory); the next submit starts a fresh one"""
+    global _executor
+    with _executor_lock:
+        if _executor is not broken:
+            return
+        _executor = None
+    print("OCR worker pool is broken, replacing it")
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _submit(fn, *args):
+    """Submit to the pool, replacing it once if it turns out to be broken"""
+    executor = get_executor()
+    try:
+        future = executor.submit(fn, *args)
+    except BrokenProcessPool:
+        _discard_executor(executor)
+        executor = get_executor()
+        future = executor.submit(fn, *args)
+
+    def check_broken(f):
+        if not f.cancelled() and isinstance(f.exception(), BrokenProcessPool):
+            _discard_executor(executor)
+
+    future.add_done_callback(check_broken)
+    return future
+
+
+def warm_up(timeout=WARMUP_TIMEOUT):
+    """Start every worker and wait until each one has run its initializer (loaded its reader)"""
+    with _mp_context.Manager() as manager:
+        barrier = manager.Barrier(OCR_WORKERS, timeout=timeout)
+        futures = [_submit(_ping, barrier) for _ in range(OCR_WORKERS)]
+        return sorted(f.result() for f in futures)
+
+
+def submit_ocr(source, preset=DEFAULT_PRESET):
+    """
+    Queue an image on the pool and return the Future for its packed results.
+    source is a file path, encoded image bytes or a decoded BGR array.
+    """
+    if isinstance(source, np.ndarray):
+        task = _ocr_image
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        task = _run_ocr_bytes
+    else:
+        task = _run_ocr
+    return _submit(task, source, preset)
+
+
+def run_ocr(source, preset=DEFAULT_PRESET):
+    """OCR an image on the pool and wait for the packed results (blocks only the caller)"""
+    return submit_ocr(source, preset).result()
+
+
+def _get_manager():
+    global _manager
+    with _executor_lock:
+        if _manager is None:
+            _manager = _mp_context.Manager()
+    return _manager
+
+
+def stream_ocr(data, preset=DEFAULT_PRESET):
+    """
+    OCR encoded image bytes on the pool, line by line. Returns (lines, future): lines yields
+    (bbox, text, confidence) as the worker recognises them and ends with the task; the future
+    holds the packed results (or the task's error). Cancel the future if lines is abandoned.
+    """
+    lines = _get_manager().Queue()
+    future = _submit(_stream_ocr_bytes, data, preset, lines)
+    # Ends the iteration also when the task fails or its worker dies
+    future.add_done_callback(lambda f: lines.put(None))
+    return iter(lines.get, None), future
+
+
+def _prune_jobs():
+    """Drop finished jobs older than JOB_TTL_SECONDS (caller holds _jobs_lock)"""
+    cutoff = time.time() - JOB_TTL_SECONDS
+    expired = [job_id for job_id, job in _jobs.items()
+               if job['finished_at'] and job['finished_at'] < cutoff]
+    for job_id in expired:
+        _jobs.pop(job_id, None)
+        _futures.pop(job_id, None)
+
+
+def _get_completion_executor():
+    global _completion
+    with _executor_lock:
+        if _completion is None:
+            _completion = ThreadPoolExecutor(max_workers=COMPLETION_WORKERS, thread_name_prefix="ocr-complete")
+    return _completion
+
+
+def _finish_job(job_id, future, on_success, on_failure=None):
+    """
+    Record the outcome and run on_success / on_failure in the parent process, on a completion
+    thread: the pool's result thread would otherwise hold back every other job's result
+    """
+    from django.db import close_old_connections
+
+    close_old_connections()
+    try:
+        _record_outcome(job_id, future, on_success, on_failure)
+    finally:
+        # Completion threads are long-lived; don't keep a connection past its lifetime
+        close_old_connections()
+
+
+def _record_outcome(job_id, future, on_success, on_failure):
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is None:
+        return
+
+    status, result, error = 'done', None, None
+    try:
+        packed = future.result()
+        result = on_success(packed, job['meta']) if on_success else {"text": ocr.packed_text(packed)}
+    except Exception as e:
+        status, error = 'failed', str(e)
+        print(f"OCR job {job_id} failed: {e}")
+        if on_failure:
+            try:
+                on_failure(job['meta'])
+            except Exception as cleanup_error:
+                print(f"OCR job {job_id} cleanup failed: {cleanup_error}")
+
+    with _jobs_lock:
+        job['status'] = status
+        job['result'] = result
+        job['error'] = error
+        job['finished_at'] = time.time()
+
+
+def submit_job(source, meta=None, on_success=None, preset=DEFAULT_PRESET, on_failure=None):
+    """
+    Queue an OCR job for an image (path, bytes or array, see submit_ocr) and return its id immediately.
+    on_success(packed, meta) runs in the parent, on a completion thread, once the worker is done;
+    its return value becomes the job result. on_failure(meta) runs if OCR or on_success fails.
+    """
+    job_id = uuid.uuid4().hex
+    job = {
+        'id': job_id,
+        'status': 'queued',
+        'meta': meta or {},
+        'result': None,
+        'error': None,
+        'created_at': time.time(),
+        'finished_at': None,
+    }
+    with _jobs_lock:
+        _prune_jobs()
+        _jobs[job_id] = job
+
+    future = submit_ocr(source, preset)
+    with _jobs_lock:
+        _futures[job_id] = future
+    future.add_done_callback(
+        lambda f: _get_completion_executor().submit(_finish_job, job_id, f, on_success, on_failure))
+    return job_id
+
+
+def get_job(job_id):
+    """Return a JSON-safe snapshot of a job, or None if it is unknown"""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return None
+        snapshot = dict(job)
+        future = _futures.get(job_id)
+
+    if snapshot['status'] == 'queued' and future is not None and future.running():
+        snapshot['status'] = 'running'
+    end = snapshot['finished_at'] or time.time()
+    snapshot['elapsed'] = round(end - snapshot['created_at'], 3)
+    return snapshot
@@ -0,0 +1,139 @@
+"""
+Image preprocessing applied before OCR.
+Phone photos are often 4000px+ wide; capping the size and dropping colour
+cuts EasyOCR time a lot with little effect on the recognised text.
+Run bench_preprocess.py to compare presets on real data.
+"""
+
+import os
+
+import cv2
+import numpy as np
+
+# Named presets: every key is optional
+#   max_dim   - longest side in pixels after downscaling (never upscales)
+#   grayscale - convert to a single channel
+#   binarize  - adaptive threshold to black/white
+#   deskew    - rotate so text lines are horizontal
+PRESETS = {
+    'none': {},
+    'fast': {'max_dim': 1600, 'grayscale': True},
+    'photo': {'max_dim': 1280, 'grayscale': True},
+    'document': {'max_dim': 2000, 'grayscale': True, 'binarize': True, 'deskew': True},
+}
+
+# Preset used for each gallery category (1 = General, 2 = Hair Style), e.g. {1: 'fast', 2: 'photo'};
+# empty until bench_preprocess.py results pick one, so every category uses DEFAULT_PRESET
+CATEGORY_PRESETS = {}
+
+DEFAULT_PRESET = os.environ.get('OCR_PREPROCESS_PRESET', 'none')
+if DEFAULT_PRESET not in PRESETS:
+    raise ValueError(f"OCR_PREPROCESS_PRESET={DEFAULT_PRESET!r} is not a preset (choose from {', '.join(PRESETS)})")
+
+# Skew corrections outside this range are treated as detection noise
+MIN_DESKEW_ANGLE = 0.5
+MAX_DESKEW_ANGLE = 15.0
+
+
+def preset_for_category(category_id):
+    """Return the preset name used for a gallery category"""
+    return CATEGORY_PRESETS.get(category_id, DEFAULT_PRESET)
+
+
+def decode_image(data):
+    """Decode encoded image bytes straight from memory into a BGR array (no temp file)"""
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("Could not decode image")
+    return img
+
+
+def cap_size(img, max_dim):
+    """Downscale so the longest side is at most max_dim pixels"""
+    h, w = img.shape[:2]
+    longest = max(h, w)
+    if longest <= max_dim:
+        return img
+    scale = max_dim / longest
+    return cv2.resize(img, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+
+
+def to_grayscale(img):
+    if img.ndim == 3:
+        return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    return img
+
+
+def binarize(img):
+    """Adaptive threshold (handles uneven lighting in photos of paper)"""
+    gray = to_grayscale(img)
+    return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 15)
+
+
+def skew_angle(img):
+    """Estimate text skew in degrees from the minimum-area box around dark pixels"""
+    gray = to_grayscale(img)
+    _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    ys, xs = np.nonzero(mask)
+    if len(xs) < 50:
+        return 0.0
+    points = np.column_stack((xs, ys)).astype(np.float32)
+    angle = cv2.minAreaRect(points)[-1] % 90
+    if angle > 45:
+        angle -= 90
+    return angle
+
+
+def deskew_matrix(img):
+    """2x3 rotation that straightens the text, or None when no correction is needed"""
+    angle = skew_angle(img)
+    if not (MIN_DESKEW_ANGLE <= abs(angle) <= MAX_DESKEW_ANGLE):
+        return None
+    h, w = img.shape[:2]
+    return cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+
+
+def rotate(img, matrix):
+    h, w = img.shape[:2]
+    return cv2.warpAffine(img, matrix, (w, h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+
+def deskew(img):
+    matrix = deskew_matrix(img)
+    return img if matrix is None else rotate(img, matrix)
+
+
+def preprocess_mapped(img, preset=DEFAULT_PRESET):
+    """
+    Run an image through the steps of a named preset and also return the 2x3 affine
+    matrix mapping original image coordinates to the processed image (downscale, then
+    deskew rotation); map_to_original() applies its inverse to OCR boxes.
+    """
+    options = PRESETS[preset]
+    h, w = img.shape[:2]
+    if options.get('max_dim'):
+        img = cap_size(img, options['max_dim'])
+    matrix = np.array([[img.shape[1] / w, 0, 0], [0, img.shape[0] / h, 0]])
+    if options.get('grayscale'):
+        img = to_grayscale(img)
+    if options.get('deskew'):
+        rotation = deskew_matrix(img)
+        if rotation is not None:
+            img = rotate(img, rotation)
+            matrix = rotation @ np.vstack([matrix, [0, 0, 1]])
+    if options.get('binarize'):
+        img = binarize(img)
+    return img, matrix
+
+
+def preprocess(img, preset=DEFAULT_PRESET):
+    """Run an image through the steps of a named preset"""
+    return preprocess_mapped(img, preset)[0]
+
+
+def map_to_original(points, matrix):
+    """Map points (..., 2) found on a preprocessed image back to original image coordinates"""
+    points = np.asarray(points, dtype=np.float32)
+    inverse = cv2.invertAffineTransform(matrix)
+    flat = points.reshape(-1, 2)
+    return (flat @ inverse[:, :2].T + inverse[:, 2]).astype(np.float32).reshape(points.shape)
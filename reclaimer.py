@@ -0,0 +1,72 @@
+"""
+Background reclaimer for deleted gallery files.
+Gallery deletes only queue their files in file_reclaim_queue; this thread unlinks them in
+batches (see db.reclaim_files). The queue lives in the database, so files
+queued before a restart are reclaimed when the app starts again.
+"""
+
+import os
+import threading
+
+from blob_store import blob_store
+
+# Seconds between queue checks when nobody wakes the reclaimer up
+RECLAIM_INTERVAL = float(os.environ.get('RECLAIM_INTERVAL', 30))
+RECLAIM_BATCH_SIZE = 200
+# Seconds before failed unlinks are retried, doubled after each failing run (at most RECLAIM_INTERVAL)
+RECLAIM_RETRY_DELAY = 2
+
+_wake = threading.Event()
+_thread = None
+_thread_lock = threading.Lock()
+
+
+def run_once():
+    """
+    Drain the queue batch by batch; returns (processed, failed) numbers of entries.
+    Stops at a batch with failed unlinks, so they are retried after a backoff
+    instead of using up their attempts right away.
+    """
+    from db import reclaim_files
+    total = total_failed = 0
+    while True:
+        processed, failed = reclaim_files(blob_store.unlink, RECLAIM_BATCH_SIZE)
+        total += processed
+        total_failed += failed
+        if failed or processed < RECLAIM_BATCH_SIZE:
+            return total, total_failed
+
+
+def _run():
+    retry_delay = RECLAIM_RETRY_DELAY
+    while True:
+        failed = 0
+        try:
+            processed, failed = run_once()
+            if processed:
+                print(f"Reclaimer: processed {processed} queued files ({failed} failed)")
+        except Exception as e:
+            print(f"Reclaimer failed: {e}")
+        if failed:
+            wait = min(retry_delay, RECLAIM_INTERVAL)
+            retry_delay *= 2
+        else:
+            wait = RECLAIM_INTERVAL
+            retry_delay = RECLAIM_RETRY_DELAY
+        _wake.wait(wait)
+        _wake.clear()
+
+
+def wake():
+    """Ask the reclaimer to process the queue now (e.g. right after a delete)"""
+    _wake.set()
+
+
+def start():
+    """Start the reclaimer thread once; it first drains whatever is left from a previous run"""
+    global _thread
+    with _thread_lock:
+        if _thread is not None:
+            return
+        _thread = threading.Thread(target=_run, name="file-reclaimer", daemon=True)
+        _thread.start()
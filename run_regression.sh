@@ -5,8 +5,19 @@ echo "=========================================="
 echo "Starting test execution..."
 echo ""
 
-# 1. Auth Tests
-echo "[1/5] Running Authentication Tests..."
+# 1. Import Smoke Check (offline, no server needed)
+echo "[1/11] Checking Project Imports..."
+./venv/bin/python3 tests/check_imports.py
+if [ $? -eq 0 ]; then
+    echo "✅ Import Check Passed"
+else
+    echo "❌ Import Check Failed"
+    exit 1
+fi
+echo ""
+
+# 2. Auth Tests
+echo "[2/11] Running Authentication Tests..."
 ./venv/bin/python3 tests/test_auth.py
 if [ $? -eq 0 ]; then
     echo "✅ Auth Tests Passed"
@@ -16,8 +27,8 @@ else
 fi
 echo ""
 
-# 2. Flask User CRUD Tests
-echo "[2/5] Running Flask User CRUD Tests..."
+# 3. Flask User CRUD Tests
+echo "[3/11] Running Flask User CRUD Tests..."
 ./venv/bin/python3 tests/test_users_flask.py
 if [ $? -eq 0 ]; then
     echo "✅ Flask User CRUD Tests Passed"
@@ -27,8 +38,8 @@ else
 fi
 echo ""
 
-# 3. Upload & OCR Tests
-echo "[3/5] Running Upload & OCR Tests..."
+# 4. Upload & OCR Tests
+echo "[4/11] Running Upload & OCR Tests..."
 ./venv/bin/python3 tests/test_upload_ocr.py
 if [ $? -eq 0 ]; then
     echo "✅ Upload & OCR Tests Passed"
@@ -38,8 +49,8 @@ else
 fi
 echo ""
 
-# 4. FastAPI Tests
-echo "[4/5] Running FastAPI Tests..."
+# 5. FastAPI Tests
+echo "[5/11] Running FastAPI Tests..."
 ./venv/bin/python3 tests/test_api.py
 if [ $? -eq 0 ]; then
     echo "✅ FastAPI Tests Passed"
@@ -49,8 +60,8 @@ else
 fi
 echo ""
 
-# 5. Dashboard Stocks Tests
-echo "[5/5] Running Dashboard Stocks Tests..."
+# 6. Dashboard Stocks Tests
+echo "[6/11] Running Dashboard Stocks Tests..."
 ./venv/bin/python3 tests/test_dashboard_stocks.py
 if [ $? -eq 0 ]; then
     echo "✅ Dashboard Stocks Tests Passed"
@@ -60,6 +71,61 @@ else
 fi
 echo ""
 
+# 7. Hair Overlay Tests (offline, no server needed)
+echo "[7/11] Running Hair Overlay Tests..."
+./venv/bin/python3 tests/test_hair_overlay.py
+if [ $? -eq 0 ]; then
+    echo "✅ Hair Overlay Tests Passed"
+else
+    echo "❌ Hair Overlay Tests Failed"
+    exit 1
+fi
+echo ""
+
+# 8. Hair Asset Cache Tests (offline, no server needed)
+echo "[8/11] Running Hair Asset Cache Tests..."
+./venv/bin/python3 tests/test_hair_assets.py
+if [ $? -eq 0 ]; then
+    echo "✅ Hair Asset Cache Tests Passed"
+else
+    echo "❌ Hair Asset Cache Tests Failed"
+    exit 1
+fi
+echo ""
+
+# 9. OCR Preprocessing Tests (offline, no server needed)
+echo "[9/11] Running OCR Preprocessing Tests..."
+./venv/bin/python3 tests/test_preprocess.py
+if [ $? -eq 0 ]; then
+    echo "✅ OCR Preprocessing Tests Passed"
+else
+    echo "❌ OCR Preprocessing Tests Failed"
+    exit 1
+fi
+echo ""
+
+# 10. Word Audio Index Tests (offline, no server needed)
+echo "[10/11] Running Word Audio Index Tests..."
+./venv/bin/python3 tests/test_audio_index.py
+if [ $? -eq 0 ]; then
+    echo "✅ Word Audio Index Tests Passed"
+else
+    echo "❌ Word Audio Index Tests Failed"
+    exit 1
+fi
+echo ""
+
+# 11. Word Extraction Scan Tests (offline, no server needed)
+echo "[11/11] Running Word Extraction Scan Tests..."
+./venv/bin/python3 tests/test_word_extract.py
+if [ $? -eq 0 ]; then
+    echo "✅ Word Extraction Scan Tests Passed"
+else
+    echo "❌ Word Extraction Scan Tests Failed"
+    exit 1
+fi
+echo ""
+
 echo "=========================================="
 echo "    ALL TESTS PASSED SUCCESSFULLY!       "
 echo "=========================================="
@@ -0,0 +1,72 @@
+"""
+Import smoke check (offline, no dependencies needed).
+Every `from <project module> import name` in the project's own modules and tests
+must name something defined at the top level of that module (imports inside a
+try block are optional by design and skipped), so a function
+removed from db.py while gallery_io.py still imports it fails the run instead
+of the app failing at startup.
+"""
+
+import ast
+import glob
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def top_level_names(tree):
+    names = set()
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                names.add((alias.asname or alias.name).split('.')[0])
+        elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                for el in ast.walk(target):
+                    if isinstance(el, ast.Name):
+                        names.add(el.id)
+        elif isinstance(node, (ast.If, ast.Try)):
+            # Names defined under a top-level if/try (e.g. optional imports)
+            names |= top_level_names(ast.Module(body=list(ast.iter_child_nodes(node)), type_ignores=[]))
+    return names
+
+
+def checked_imports(node, guarded=False):
+    """ImportFrom nodes of a tree, skipping those inside a try block (deliberately optional)"""
+    if isinstance(node, ast.ImportFrom) and not guarded:
+        yield node
+    for child in ast.iter_child_nodes(node):
+        yield from checked_imports(child, guarded or isinstance(node, ast.Try))
+
+
+def main():
+    modules = {}
+    for path in glob.glob(os.path.join(ROOT, "*.py")):
+        with open(path, encoding="utf-8") as f:
+            modules[os.path.splitext(os.path.basename(path))[0]] = ast.parse(f.read(), path)
+    defined = {name: top_level_names(tree) for name, tree in modules.items()}
+
+    files = glob.glob(os.path.join(ROOT, "*.py")) + glob.glob(os.path.join(ROOT, "tests", "*.py"))
+    errors = []
+    for path in sorted(files):
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), path)
+        for node in checked_imports(tree):
+            if node.level == 0 and node.module in defined:
+                for alias in node.names:
+                    if alias.name != "*" and alias.name not in defined[node.module]:
+                        errors.append(f"{os.path.relpath(path, ROOT)}:{node.lineno}: "
+                                      f"cannot import '{alias.name}' from '{node.module}'")
+
+    for error in errors:
+        print(error)
+    print(f"Checked imports of {len(files)} files: {len(errors)} broken")
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
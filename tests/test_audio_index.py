@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+import tempfile
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import audio_index
+from audio_index import AudioIndex
+
+
+class TestAudioIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = self.tmp.name
+        self.index = AudioIndex()
+        audio_index.CHECK_INTERVAL = 0
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def touch(self, name):
+        with open(os.path.join(self.folder, name), "wb") as f:
+            f.write(b"audio")
+
+    def test_matches_raw_and_sanitized_label(self):
+        self.touch("red apple.mp3")
+        self.touch("green_pear.ogg")
+        self.touch("notes.txt")
+        self.assertEqual(self.index.find(self.folder, "red apple"), ("red apple.mp3", "mp3"))
+        self.assertEqual(self.index.find(self.folder, "red_apple"), ("red apple.mp3", "mp3"))
+        self.assertEqual(self.index.find(self.folder, "green pear"), ("green_pear.ogg", "ogg"))
+        self.assertIsNone(self.index.find(self.folder, "notes"))
+        self.assertIsNone(self.index.find(self.folder, ""))
+
+    def test_prefers_raw_name_then_extension_order(self):
+        self.touch("dog_1.ogg")
+        self.touch("dog 1.wav")
+        self.touch("dog 1.mp3")
+        self.assertEqual(self.index.find(self.folder, "dog 1"), ("dog 1.mp3", "mp3"))
+        self.assertEqual(self.index.find(self.folder, "dog_1"), ("dog_1.ogg", "ogg"))
+
+    def test_refreshes_when_folder_changes(self):
+        self.touch("cat.ogg")
+        self.assertIsNotNone(self.index.find(self.folder, "cat"))
+        self.assertIsNone(self.index.find(self.folder, "bird"))
+
+        time.sleep(0.01)
+        self.touch("bird.wav")
+        os.remove(os.path.join(self.folder, "cat.ogg"))
+        self.assertEqual(self.index.find(self.folder, "bird"), ("bird.wav", "wav"))
+        self.assertIsNone(self.index.find(self.folder, "cat"))
+
+    def test_missing_folder(self):
+        self.assertIsNone(self.index.find(os.path.join(self.folder, "missing"), "cat"))
+
+if __name__ == '__main__':
+    unittest.main()
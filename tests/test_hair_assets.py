@@ -0,0 +1,56 @@
+import unittest
+import sys
+import os
+import tempfile
+import time
+
+import numpy as np
+import cv2
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import hair_assets
+from hair_assets import HairAssetCache
+
+
+class TestHairAssetCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = os.path.join(self.tmp.name, "male")
+        os.makedirs(self.folder)
+        self.write_asset("1.png", 200)
+        # Assets without an alpha channel are skipped
+        cv2.imwrite(os.path.join(self.folder, "no_alpha.png"), np.zeros((10, 10, 3), dtype=np.uint8))
+        self.cache = HairAssetCache(root=self.tmp.name, max_resized=2)
+        hair_assets.CHECK_INTERVAL = 0
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_asset(self, name, width):
+        img = np.full((width // 2, width, 4), 255, dtype=np.uint8)
+        cv2.imwrite(os.path.join(self.folder, name), img)
+
+    def test_names_skip_assets_without_alpha(self):
+        self.assertEqual(self.cache.names("male"), ["1.png"])
+        self.assertEqual(self.cache.names("missing"), [])
+
+    def test_resized_is_memoized_and_evicted(self):
+        first = self.cache.resized("male", "1.png", 100)
+        self.assertEqual(first.shape, (50, 100, 4))
+        self.assertIs(self.cache.resized("male", "1.png", 100), first)
+
+        self.cache.resized("male", "1.png", 80)
+        self.cache.resized("male", "1.png", 60)
+        self.assertIsNot(self.cache.resized("male", "1.png", 100), first)
+
+    def test_reloads_when_folder_changes(self):
+        self.assertEqual(self.cache.names("male"), ["1.png"])
+        time.sleep(0.01)
+        self.write_asset("2.png", 120)
+        self.assertEqual(self.cache.names("male"), ["1.png", "2.png"])
+
+if __name__ == '__main__':
+    unittest.main()
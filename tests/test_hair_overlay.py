@@ -0,0 +1,92 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+import cv2
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from hair_overlay import alpha_composite, apply_hair, composite_premultiplied, hair_placement, premultiply
+
+
+def reference_apply_hair(base_img, hair_img, face_region):
+    """The original per-channel overlay loop from upload(), kept as the regression baseline"""
+    variant_img = base_img.copy()
+    fx, fy, fw = face_region['x'], face_region['y'], face_region['w']
+    scale_factor = 1.3
+    target_width = int(fw * scale_factor)
+    aspect_ratio = hair_img.shape[0] / hair_img.shape[1]
+    target_height = int(target_width * aspect_ratio)
+    hair_resized = cv2.resize(hair_img, (target_width, target_height))
+
+    face_center_x = fx + fw // 2
+    hair_x = face_center_x - target_width // 2
+    hair_y = fy - int(target_height * 0.45)
+    y1, y2 = hair_y, hair_y + target_height
+    x1, x2 = hair_x, hair_x + target_width
+
+    alpha_s = hair_resized[:, :, 3] / 255.0
+    alpha_l = 1.0 - alpha_s
+    for c in range(0, 3):
+        r_y1, r_y2 = max(0, y1), min(variant_img.shape[0], y2)
+        r_x1, r_x2 = max(0, x1), min(variant_img.shape[1], x2)
+        a_y1 = max(0, -y1)
+        a_y2 = a_y1 + (r_y2 - r_y1)
+        a_x1 = max(0, -x1)
+        a_x2 = a_x1 + (r_x2 - r_x1)
+        if r_y2 > r_y1 and r_x2 > r_x1:
+            variant_img[r_y1:r_y2, r_x1:r_x2, c] = (alpha_s[a_y1:a_y2, a_x1:a_x2] * hair_resized[a_y1:a_y2, a_x1:a_x2, c] +
+                                                    alpha_l[a_y1:a_y2, a_x1:a_x2] * variant_img[r_y1:r_y2, r_x1:r_x2, c])
+    return variant_img
+
+
+class TestHairOverlay(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.base = rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+        self.hair = rng.integers(0, 256, (300, 400, 4), dtype=np.uint8)
+        # Fully transparent and fully opaque areas, like real assets
+        self.hair[:50, :, 3] = 0
+        self.hair[-50:, :, 3] = 255
+
+    def assert_matches_reference(self, face_region, mode):
+        expected = reference_apply_hair(self.base, self.hair, face_region)
+        actual = apply_hair(self.base.copy(), self.hair, face_region, mode)
+        diff = np.abs(expected.astype(np.int16) - actual.astype(np.int16))
+        self.assertLessEqual(int(diff.max()), 1, f"mode={mode} region={face_region}")
+
+    def test_matches_reference_inside_and_clipped(self):
+        """Vectorized compositing is within 1 level of the original loop, including at the borders"""
+        regions = [
+            {'x': 200, 'y': 200, 'w': 150, 'h': 150},   # fully inside
+            {'x': 250, 'y': 20, 'w': 200, 'h': 200},    # clipped at the top
+            {'x': -80, 'y': 150, 'w': 200, 'h': 200},   # clipped at the left
+            {'x': 560, 'y': 400, 'w': 200, 'h': 200},   # clipped at the right and bottom
+        ]
+        for mode in ('fixed', 'float32'):
+            for region in regions:
+                self.assert_matches_reference(region, mode)
+
+    def test_premultiplied_matches_straight_alpha(self):
+        """Compositing a premultiplied asset gives the same pixels (within 1) as straight alpha"""
+        for x, y in [(100, 100), (-50, -40), (500, 300)]:
+            expected = alpha_composite(self.base.copy(), self.hair, x, y)
+            actual = composite_premultiplied(self.base.copy(), premultiply(self.hair), x, y)
+            diff = np.abs(expected.astype(np.int16) - actual.astype(np.int16))
+            self.assertLessEqual(int(diff.max()), 1)
+
+    def test_no_overlap_leaves_image_unchanged(self):
+        dst = self.base.copy()
+        alpha_composite(dst, self.hair, 5000, 5000)
+        self.assertTrue(np.array_equal(dst, self.base))
+
+    def test_placement(self):
+        width, height, x, y = hair_placement({'x': 100, 'y': 100, 'w': 100, 'h': 100}, (300, 400, 4))
+        self.assertEqual((width, height), (130, 97))
+        self.assertEqual((x, y), (85, 100 - int(97 * 0.45)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+import cv2
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from preprocess import DEFAULT_PRESET, preprocess, preprocess_mapped, map_to_original
+
+
+def tilted_page(angle=5):
+    """White page with rows of black text, rotated by angle degrees"""
+    img = np.full((1200, 3000, 3), 255, dtype=np.uint8)
+    for row in range(8):
+        cv2.putText(img, "The quick brown fox jumps", (100, 150 + row * 120),
+                    cv2.FONT_HERSHEY_SIMPLEX, 3, (0, 0, 0), 6)
+    matrix = cv2.getRotationMatrix2D((1500, 600), angle, 1.0)
+    return cv2.warpAffine(img, matrix, (3000, 1200), borderValue=(255, 255, 255))
+
+
+def forward(points, matrix):
+    points = np.asarray(points, dtype=np.float64)
+    return points @ matrix[:, :2].T + matrix[:, 2]
+
+
+class TestPreprocessMapping(unittest.TestCase):
+
+    def test_default_preset_leaves_image_alone(self):
+        self.assertEqual(DEFAULT_PRESET, 'none')
+        img = tilted_page()
+        out, matrix = preprocess_mapped(img)
+        self.assertIs(out, img)
+        np.testing.assert_allclose(matrix, [[1, 0, 0], [0, 1, 0]])
+
+    def test_resize_only_maps_back_by_scale(self):
+        out, matrix = preprocess_mapped(tilted_page(), 'fast')
+        self.assertEqual(max(out.shape[:2]), 1600)
+        box = [[10, 20], [300, 20], [300, 80], [10, 80]]
+        np.testing.assert_allclose(map_to_original(box, matrix), np.array(box) * 3000 / 1600, rtol=1e-3)
+
+    def test_deskewed_boxes_map_back_through_rotation(self):
+        img = tilted_page()
+        out, matrix = preprocess_mapped(img, 'document')
+        # The preset rotated the page, so the transform is more than a scale
+        self.assertGreater(abs(matrix[0, 1]), 0.01)
+        np.testing.assert_array_equal(out, preprocess(img, 'document'))
+
+        original = np.array([[[1000, 700], [1400, 700], [1400, 760], [1000, 760]]], dtype=np.float32)
+        mapped = map_to_original(forward(original.reshape(-1, 2), matrix).reshape(original.shape), matrix)
+        self.assertEqual(mapped.shape, original.shape)
+        np.testing.assert_allclose(mapped, original, atol=0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
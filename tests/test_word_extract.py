@@ -0,0 +1,89 @@
+import unittest
+import sys
+import os
+import io
+import tempfile
+
+import cv2
+import numpy as np
+from docx import Document
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.shared import Pt
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from word_extract import CATEGORIES, NameAllocator, plan_images, scan_body, IMAGE, PARAGRAPH, RUN
+from bench_word_scan import legacy_plan
+
+
+def png(value):
+    ok, buf = cv2.imencode(".png", np.full((8, 8, 3), value, dtype=np.uint8))
+    return io.BytesIO(buf.tobytes())
+
+
+class TestWordScan(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        doc = Document()
+        para = doc.add_paragraph()
+        para.add_run().add_picture(png(1), width=Pt(8))  # before any marker or label
+        doc.add_paragraph(f"{CATEGORIES[1]} 1")
+        for i, label in enumerate(["cat", "cat", "cat_1", "cat", "red apple"]):
+            para = doc.add_paragraph()
+            run = para.add_run(label)
+            if i == 4:
+                run.add_tab()
+            para.add_run().add_picture(png(10 + i), width=Pt(8))
+        # Hyperlink text counts for the paragraph (markers) but is not a run label
+        para = doc.add_paragraph()
+        link = OxmlElement("w:hyperlink")
+        link_run = OxmlElement("w:r")
+        link_text = OxmlElement("w:t")
+        link_text.text = CATEGORIES[0]
+        link_run.append(link_text)
+        link.append(link_run)
+        para._p.append(link)
+        para.add_run().add_picture(png(20), width=Pt(8))
+        path = os.path.join(self.tmp.name, "test.docx")
+        doc.save(path)
+        self.doc = Document(path)
+        self.rel_map = {rel.rId: rel.target_part for rel in self.doc.part.rels.values()
+                        if "image" in rel.target_ref}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_events_in_document_order(self):
+        events = list(scan_body(self.doc.element.body))
+        self.assertEqual(events[0], (PARAGRAPH, ""))
+        self.assertEqual(events[2][0], IMAGE)
+        self.assertEqual(events[3], (PARAGRAPH, f"{CATEGORIES[1]} 1"))
+        self.assertIn((RUN, "red apple"), events)
+        self.assertIn((PARAGRAPH, CATEGORIES[0]), events)
+        self.assertEqual(sum(1 for kind, _ in events if kind == IMAGE), 7)
+
+    def test_plan_matches_previous_walk(self):
+        plan = [(item["relative_dir"], item["filename"], item["label"])
+                for item in plan_images(self.doc, self.rel_map)]
+        self.assertEqual(plan, legacy_plan(self.doc, self.rel_map))
+        names = [filename for _, filename, _ in plan]
+        self.assertEqual(names[:5], ["image.png", "cat.png", "cat_1.png", "cat_1_1.png", "cat_2.png"])
+        self.assertEqual(plan[-1][0], os.path.join(CATEGORIES[0].replace(" ", "_"), "round_1"))
+
+
+class TestNameAllocator(unittest.TestCase):
+
+    def test_suffixes_skip_taken_names(self):
+        names = NameAllocator()
+        self.assertEqual(names.allocate("a", "x", "png"), "x.png")
+        self.assertEqual(names.allocate("a", "x_1", "png"), "x_1.png")
+        self.assertEqual(names.allocate("a", "x", "png"), "x_2.png")
+        self.assertEqual(names.allocate("a", "x", "png"), "x_3.png")
+        self.assertEqual(names.allocate("a", "x", "jpg"), "x.jpg")
+        self.assertEqual(names.allocate("b", "x", "png"), "x.png")
+
+if __name__ == '__main__':
+    unittest.main()
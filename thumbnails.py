@@ -0,0 +1,165 @@
+"""
+Thumbnail cache for gallery uploads.
+Thumbnails are generated on first request in a few width buckets, stored under
+a sharded cache directory (ab/cd/<key>.<ext>) and evicted least-recently-used
+once the directory grows past THUMB_CACHE_MAX_BYTES. The key covers the
+source file's name, size and mtime plus the bucket and encoding settings,
+so it doubles as a strong ETag.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import cv2
+
+THUMB_CACHE_DIR = os.environ.get('THUMB_CACHE_DIR', os.path.join("uploads", ".thumbs"))
+THUMB_SIZES = (256, 768)
+# 'webp' or 'jpeg'
+THUMB_FORMAT = os.environ.get('THUMB_FORMAT', 'webp')
+THUMB_QUALITY = int(os.environ.get('THUMB_QUALITY', 80))
+THUMB_CACHE_MAX_BYTES = int(os.environ.get('THUMB_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+THUMB_FORMATS = {
+    'jpeg': ('.jpg', cv2.IMWRITE_JPEG_QUALITY, 'image/jpeg'),
+    'webp': ('.webp', cv2.IMWRITE_WEBP_QUALITY, 'image/webp'),
+}
+
+
+class ThumbnailCache:
+    """Size-bucketed thumbnails on disk with a size-capped LRU index"""
+
+    def __init__(self, root=THUMB_CACHE_DIR, sizes=THUMB_SIZES, thumb_format=THUMB_FORMAT,
+                 quality=THUMB_QUALITY, max_bytes=THUMB_CACHE_MAX_BYTES):
+        if thumb_format not in THUMB_FORMATS:
+            raise ValueError(f"Unknown thumbnail format: {thumb_format}")
+        self.root = root
+        self.sizes = tuple(sorted(sizes))
+        self.thumb_format = thumb_format
+        self.quality = quality
+        self.max_bytes = max_bytes
+        self._index = None              # path -> size in bytes, least recently used first
+        self._total = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}            # key -> lock so a thumbnail is generated only once
+
+    @property
+    def mimetype(self):
+        return THUMB_FORMATS[self.thumb_format][2]
+
+    def bucket(self, width):
+        """Smallest configured size that is at least width (the largest one otherwise)"""
+        for size in self.sizes:
+            if size >= width:
+                return size
+        return self.sizes[-1]
+
+    def _load_index(self):
+        """Scan the cache directory once, oldest files first (caller holds the lock)"""
+        if self._index is not None:
+            return
+        files = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((st.st_mtime, path, st.st_size))
+        files.sort()
+        self._index = OrderedDict((path, size) for _, path, size in files)
+        self._total = sum(self._index.values())
+
+    def _key(self, source_path, size):
+        st = os.stat(source_path)
+        raw = f"{os.path.basename(source_path)}|{st.st_size}|{st.st_mtime_ns}|{size}|{self.thumb_format}|{self.quality}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _path(self, key):
+        ext = THUMB_FORMATS[self.thumb_format][0]
+        return os.path.join(self.root, key[:2], key[2:4], key + ext)
+
+    def _touch(self, path):
+        """Mark a cached thumbnail as recently used; False if it is not cached"""
+        with self._lock:
+            self._load_index()
+            if path not in self._index:
+                return False
+            self._index.move_to_end(path)
+        return True
+
+    def _add(self, path, nbytes):
+        with self._lock:
+            self._load_index()
+            self._total += nbytes - self._index.pop(path, 0)
+            self._index[path] = nbytes
+            evicted = []
+            while self._total > self.max_bytes and len(self._index) > 1:
+                old_path, old_size = self._index.popitem(last=False)
+                self._total -= old_size
+                evicted.append(old_path)
+        for old_path in evicted:
+            try:
+                os.remove(old_path)
+            except FileNotFoundError:
+                pass
+
+    def _generate(self, source_path, size, path):
+        img = cv2.imread(source_path)
+        if img is None:
+            return False
+        height, width = img.shape[:2]
+        if width > size:
+            img = cv2.resize(img, (size, max(1, round(height * size / width))), interpolation=cv2.INTER_AREA)
+
+        ext, quality_flag, _ = THUMB_FORMATS[self.thumb_format]
+        ok, buf = cv2.imencode(ext, img, [quality_flag, self.quality])
+        if not ok:
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(buf.tobytes())
+        os.replace(tmp_path, path)
+        self._add(path, len(buf))
+        return True
+
+    def get(self, source_path, width):
+        """
+        Thumbnail of source_path for the bucket covering width, generating it if needed.
+        Returns (path, etag), or (None, None) if the source is missing or not an image.
+        """
+        if not os.path.isfile(source_path):
+            return None, None
+        size = self.bucket(width)
+        key = self._key(source_path, size)
+        path = self._path(key)
+        if self._touch(path) and os.path.exists(path):
+            return path, key
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            try:
+                # Another request may have generated it while we waited
+                if not (self._touch(path) and os.path.exists(path)):
+                    if not self._generate(source_path, size, path):
+                        return None, None
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+        return path, key
+
+    def stats(self):
+        with self._lock:
+            self._load_index()
+            return {"files": len(self._index), "bytes": self._total, "max_bytes": self.max_bytes,
+                    "sizes": list(self.sizes), "format": self.thumb_format}
+
+
+# Shared instance used by the Flask app
+thumbnails = ThumbnailCache()
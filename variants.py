@@ -0,0 +1,285 @@
+"""
+Lazy Hair Style variants.
+An upload only records a recipe session (the decoded original, face region, gender,
+assets); each variant is rendered when it is first requested, at the requested
+width, and only the variant the user picks is written to disk.
+Previews can be pre-rendered in parallel on a bounded thread pool (OpenCV
+releases the GIL in resize/encode); per-stage timings are kept for each preview.
+"""
+
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from hair_assets import hair_assets
+
+VARIANT_COUNT = 8
+# Sessions are forgotten after this many seconds
+SESSION_TTL_SECONDS = 1800
+# Sessions hold the decoded original in memory, so keep only the newest ones within
+# both a count and a total size (a 12 MP upload alone is ~36 MB decoded)
+MAX_SESSIONS = int(os.environ.get('VARIANT_MAX_SESSIONS', 32))
+MAX_SESSION_BYTES = int(os.environ.get('VARIANT_MAX_SESSION_BYTES', 256 * 1024 * 1024))
+# Max number of encoded previews / downscaled base images kept in memory
+RENDER_CACHE_SIZE = int(os.environ.get('VARIANT_RENDER_CACHE_SIZE', 128))
+BASE_CACHE_SIZE = 16
+# Preview encoding: 'jpeg' or 'webp', quality 1-100
+PREVIEW_FORMAT = os.environ.get('VARIANT_PREVIEW_FORMAT', 'jpeg')
+PREVIEW_QUALITY = int(os.environ.get('VARIANT_PREVIEW_QUALITY', 85))
+# Threads used to pre-render previews
+RENDER_WORKERS = int(os.environ.get('VARIANT_RENDER_WORKERS', min(8, os.cpu_count() or 1)))
+
+PREVIEW_FORMATS = {
+    'jpeg': ('.jpg', cv2.IMWRITE_JPEG_QUALITY, 'image/jpeg'),
+    'webp': ('.webp', cv2.IMWRITE_WEBP_QUALITY, 'image/webp'),
+}
+STAGES = ('resize', 'composite', 'encode')
+
+
+class LRU:
+    """Small thread-safe LRU dict"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def discard(self, predicate):
+        with self._lock:
+            for key in [k for k in self._items if predicate(k)]:
+                del self._items[key]
+
+
+class VariantStore:
+    """Recipe sessions plus caches of downscaled bases and encoded previews"""
+
+    def __init__(self, preview_format=PREVIEW_FORMAT, quality=PREVIEW_QUALITY, workers=RENDER_WORKERS):
+        if preview_format not in PREVIEW_FORMATS:
+            raise ValueError(f"Unknown preview format: {preview_format}")
+        self.preview_format = preview_format
+        self.quality = quality
+        self.workers = workers
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._bases = LRU(BASE_CACHE_SIZE)
+        self._rendered = LRU(RENDER_CACHE_SIZE)   # key -> (bytes, timings)
+        self._inflight = {}                       # key -> Future of a preview being pre-rendered
+        self._base_locks = {}                     # (token, width) -> lock so a base is downscaled only once
+        self._executor = None
+        self._totals = {stage: 0.0 for stage in STAGES}
+        self._rendered_count = 0
+
+    @property
+    def mimetype(self):
+        return PREVIEW_FORMATS[self.preview_format][2]
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="variant-render")
+            return self._executor
+
+    def _prune(self, incoming=0):
+        """
+        Drop expired sessions, then the oldest ones until a new session holding an image of
+        incoming bytes fits MAX_SESSIONS and MAX_SESSION_BYTES (caller holds the lock)
+        """
+        cutoff = time.time() - SESSION_TTL_SECONDS
+        by_age = sorted(self._sessions.values(), key=lambda s: s['created_at'])
+        count = len(by_age)
+        total = sum(s['image'].nbytes for s in by_age)
+        expired = []
+        for s in by_age:
+            if s['created_at'] >= cutoff and count < MAX_SESSIONS and total + incoming <= MAX_SESSION_BYTES:
+                break
+            expired.append(s['token'])
+            count -= 1
+            total -= s['image'].nbytes
+        for token in expired:
+            del self._sessions[token]
+            self._bases.discard(lambda k: k[0] == token)
+            self._rendered.discard(lambda k: k[0] == token)
+
+    def create(self, image, filename, gender, face_region):
+        """Record a recipe session for a decoded upload (BGR array) and return its token"""
+        asset_folder = "male" if gender == "Man" else "female"
+        assets = hair_assets.names(asset_folder)
+
+        token = secrets.token_urlsafe(16)
+        session = {
+            'token': token,
+            'image': image,
+            'filename': filename,
+            'gender': gender,
+            'face_region': {k: int(face_region[k]) for k in ('x', 'y', 'w', 'h')},
+            'asset_folder': asset_folder,
+            # Cycle through assets: 0, 1, 0, 1... (None = colour-map fallback)
+            'assets': [assets[i % len(assets)] if assets else None for i in range(VARIANT_COUNT)],
+            'created_at': time.time(),
+        }
+        with self._lock:
+            self._prune(image.nbytes)
+            self._sessions[token] = session
+        return token
+
+    def get(self, token):
+        with self._lock:
+            return self._sessions.get(token)
+
+    def recipes(self, session):
+        """JSON-safe descriptors of every variant in a session"""
+        return [
+            {
+                "id": i,
+                "asset": asset,
+                "style": f"Style {i} ({session['gender']})",
+            }
+            for i, asset in enumerate(session['assets'], start=1)
+        ]
+
+    def _base(self, session, width):
+        """
+        Original image, downscaled to width when smaller (cached per token and width).
+        Returns (image, scale) where scale maps original coordinates to the image.
+        """
+        key = (session['token'], width)
+        cached = self._bases.get(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            base_lock = self._base_locks.setdefault(key, threading.Lock())
+        with base_lock:
+            # Another render thread may have built it while we waited
+            cached = self._bases.get(key)
+            if cached is not None:
+                return cached
+            try:
+                img = session['image']
+                if not width or width >= img.shape[1]:
+                    return img, 1.0
+
+                scale = width / img.shape[1]
+                img = cv2.resize(img, (width, int(img.shape[0] * scale)), interpolation=cv2.INTER_AREA)
+                self._bases.put(key, (img, scale))
+                return img, scale
+            finally:
+                with self._lock:
+                    self._base_locks.pop(key, None)
+
+    def render(self, session, variant_id, width=None, timings=None):
+        """
+        Render one variant (1-based id) as a BGR image, full size or scaled to width.
+        If timings is a dict, the seconds spent in 'resize' and 'composite' are added to it.
+        """
+        start = time.perf_counter()
+        base, scale = self._base(session, width)
+        region = {k: int(v * scale) for k, v in session['face_region'].items()}
+        resized_at = time.perf_counter()
+
+        variant_img = base.copy()
+        asset_name = session['assets'][variant_id - 1]
+        if asset_name is None or not hair_assets.apply(variant_img, session['asset_folder'], asset_name, region):
+            # Fallback if no assets found
+            variant_img = cv2.applyColorMap(variant_img, cv2.COLORMAP_AUTUMN if variant_id % 2 == 0 else cv2.COLORMAP_WINTER)
+
+        if timings is not None:
+            timings['resize'] = timings.get('resize', 0.0) + resized_at - start
+            timings['composite'] = timings.get('composite', 0.0) + time.perf_counter() - resized_at
+        return variant_img
+
+    def _render_preview(self, session, variant_id, width):
+        """Render and encode one preview, cache it and return (bytes, timings in ms)"""
+        timings = {}
+        img = self.render(session, variant_id, width, timings)
+
+        start = time.perf_counter()
+        ext, quality_flag, _ = PREVIEW_FORMATS[self.preview_format]
+        ok, buf = cv2.imencode(ext, img, [quality_flag, self.quality])
+        if not ok:
+            raise ValueError("Could not encode preview")
+        timings['encode'] = time.perf_counter() - start
+
+        with self._lock:
+            for stage in STAGES:
+                self._totals[stage] += timings[stage]
+            self._rendered_count += 1
+        result = (buf.tobytes(), {stage: round(timings[stage] * 1000, 2) for stage in STAGES})
+        self._rendered.put((session['token'], variant_id, width), result)
+        return result
+
+    def preview(self, session, variant_id, width):
+        """
+        Encoded bytes of a variant at width and the per-stage timings (ms) it took.
+        Rendered on first request (or taken from a running pre-render) and then cached.
+        """
+        key = (session['token'], variant_id, width)
+        result = self._rendered.get(key)
+        if result is not None:
+            return result
+        with self._lock:
+            future = self._inflight.get(key)
+        if future is not None:
+            return future.result()
+        return self._render_preview(session, variant_id, width)
+
+    def prerender(self, session, width):
+        """Start rendering every preview of a session at width on the thread pool (non-blocking)"""
+        executor = self._get_executor()
+        futures = []
+        for variant_id in range(1, len(session['assets']) + 1):
+            key = (session['token'], variant_id, width)
+            if self._rendered.get(key) is not None:
+                continue
+            with self._lock:
+                if key in self._inflight:
+                    continue
+                future = executor.submit(self._render_preview, session, variant_id, width)
+                self._inflight[key] = future
+            future.add_done_callback(lambda f, key=key: self._forget_inflight(key))
+            futures.append(future)
+        return futures
+
+    def _forget_inflight(self, key):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def stats(self):
+        """Preview settings, mean per-stage timings (ms) over every rendered preview and session memory"""
+        with self._lock:
+            count = self._rendered_count
+            mean = {stage: round(total * 1000 / count, 2) if count else None for stage, total in self._totals.items()}
+            sessions = len(self._sessions)
+            session_bytes = sum(s['image'].nbytes for s in self._sessions.values())
+        return {"format": self.preview_format, "quality": self.quality, "workers": self.workers,
+                "rendered": count, "mean_ms": mean, "sessions": sessions, "session_bytes": session_bytes}
+
+    def finish(self, token):
+        """Forget a session once a variant has been saved"""
+        with self._lock:
+            self._sessions.pop(token, None)
+        self._bases.discard(lambda k: k[0] == token)
+        self._rendered.discard(lambda k: k[0] == token)
+
+
+# Shared instance used by the Flask app
+variant_store = VariantStore()
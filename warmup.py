@@ -0,0 +1,80 @@
+"""
+Opt-in model warm-up at startup.
+Loads the OCR worker pool and the DeepFace gender model in a background thread
+and runs a dummy inference through each, so the first real request does not pay
+for model loading. /readyz reports the per-model state.
+
+Enable with WARMUP_MODELS=1.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+WARMUP_MODELS = os.environ.get('WARMUP_MODELS', '0') == '1'
+
+_state = {}     # model name -> {'state', 'load_seconds', 'error'}
+_state_lock = threading.Lock()
+_thread = None
+
+
+def _warm_ocr_pool():
+    """Start every OCR worker; each one loads its reader and runs a dummy readtext"""
+    import ocr_jobs
+    ocr_jobs.warm_up()
+
+
+def _warm_deepface_gender():
+    """Build the resident face detector and gender model and run one analysis on a blank image"""
+    from face_analysis import face_analyzer
+    face_analyzer.load()
+    face_analyzer.analyze(np.zeros((224, 224, 3), dtype=np.uint8))
+
+
+# Loaded in this order
+MODELS = {
+    'ocr_pool': _warm_ocr_pool,
+    'deepface_gender': _warm_deepface_gender,
+}
+
+
+def _set_state(name, **fields):
+    with _state_lock:
+        _state[name].update(fields)
+
+
+def _run():
+    for name, loader in MODELS.items():
+        _set_state(name, state='loading')
+        start = time.perf_counter()
+        try:
+            loader()
+            _set_state(name, state='ready', load_seconds=round(time.perf_counter() - start, 3))
+            print(f"Warm-up: {name} ready in {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            _set_state(name, state='failed', load_seconds=round(time.perf_counter() - start, 3), error=str(e))
+            print(f"Warm-up: {name} failed: {e}")
+
+
+def start():
+    """Start the warm-up thread once (no-op unless WARMUP_MODELS=1)"""
+    global _thread
+    if not WARMUP_MODELS or _thread is not None:
+        return
+    with _state_lock:
+        for name in MODELS:
+            _state[name] = {'state': 'pending', 'load_seconds': None, 'error': None}
+    _thread = threading.Thread(target=_run, name="model-warmup", daemon=True)
+    _thread.start()
+
+
+def status():
+    """Readiness snapshot: ready is True once every model has loaded"""
+    if not WARMUP_MODELS:
+        return {'warmup': False, 'ready': True, 'models': {}}
+    with _state_lock:
+        models = {name: dict(info) for name, info in _state.items()}
+    ready = bool(models) and all(info['state'] == 'ready' for info in models.values())
+    return {'warmup': True, 'ready': ready, 'models': models}
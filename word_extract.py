@@ -0,0 +1,318 @@
+"""
+Word (.docx) image extraction.
+Images are saved per category and round under static/word_images/<category>/round_<n>/
+with the label found before them, plus a matching audio file from images_audio
+(looked up through audio_index).
+Each distinct image or audio file is stored once by content hash under
+static/word_images/.blobs and hardlinked into the round folders, so labels and
+pictures reused across rounds take no extra space; word_images paths are the
+per-round paths as before.
+All image rows of a document are written in one transaction; files are staged
+next to their targets and only renamed into place once the rows are committed,
+so a failure leaves neither rows nor files behind.
+"""
+
+import os
+import re
+import threading
+import uuid
+
+from audio_index import audio_index
+from blob_store import BlobStore
+
+WORD_IMAGES_FOLDER = os.path.join("static", "word_images")
+AUDIO_FOLDER_NAME = "images_audio"
+# Content-addressed store the round folders hardlink into
+BLOB_DIR_NAME = ".blobs"
+
+# Category and Round management
+CATEGORIES = ["תרגול", "שליחה לקלינאית"]
+DEFAULT_CATEGORY = "תרגול"
+
+
+def sanitize(name):
+    """Helper to sanitize folder/file names"""
+    return re.sub(r'[\\/*?:"<>|]', "", name).strip().replace(" ", "_")
+
+
+class StagedFiles:
+    """
+    Files of one extraction, materialized from a content-addressed store and
+    published or discarded together. Each distinct image or audio file is
+    stored once under <images folder>/.blobs and staged at its round path as
+    a hardlink (a copy across devices) beside the target.
+    """
+
+    # Source audio file (path, mtime, size) -> blob path, so unchanged files are not re-read
+    _source_blobs = {}
+    # Held while storing + linking and while rollback removes blobs, so no blob is removed under a new link
+    _store_lock = threading.Lock()
+
+    def __init__(self, images_folder, tag=None):
+        self.store = BlobStore(os.path.join(images_folder, BLOB_DIR_NAME))
+        self._staged = []   # (temp path, final path)
+        self._created = []  # blobs this extraction added to the store
+        # A fixed tag (the job id) lets a resumed job replace what an interrupted run staged
+        self._tag = tag or f"{uuid.uuid4().hex[:8]}.{threading.get_ident()}"
+        self.links = self.copies = 0
+
+    def _temp_path(self, path):
+        return f"{path}.{self._tag}.part"
+
+    def _stage(self, data, blob, path, name):
+        """Store data (if new) and link it beside path; returns the blob path (caller holds the lock)"""
+        if not os.path.exists(self.store.abspath(blob["path"])):
+            self.store.put(data, name)
+            self._created.append(blob["path"])
+        self._link(blob["path"], path)
+        return blob["path"]
+
+    def _link(self, relpath, path):
+        tmp_path = self._temp_path(path)
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        if self.store.link(relpath, tmp_path):
+            self.links += 1
+        else:
+            self.copies += 1
+        self._staged.append((tmp_path, path))
+
+    def write(self, path, data):
+        blob = self.store.describe(data, path)
+        with self._store_lock:
+            self._stage(data, blob, path, path)
+
+    def copy(self, source, path):
+        st = os.stat(source)
+        key = (os.path.abspath(source), st.st_mtime_ns, st.st_size, self.store.root)
+        with self._store_lock:
+            relpath = self._source_blobs.get(key)
+            if relpath and os.path.exists(self.store.abspath(relpath)):
+                self._link(relpath, path)
+                return
+        with open(source, "rb") as f:
+            data = f.read()
+        blob = self.store.describe(data, source)
+        with self._store_lock:
+            self._source_blobs[key] = self._stage(data, blob, path, source)
+
+    def commit(self):
+        """Rename every staged file into place"""
+        for tmp_path, path in self._staged:
+            os.replace(tmp_path, path)
+        self._staged = []
+        self._created = []
+
+    def rollback(self):
+        """Delete every staged file, and the blobs added for them that nothing else links to"""
+        with self._store_lock:
+            for tmp_path, _ in self._staged:
+                try:
+                    os.remove(tmp_path)
+                except FileNotFoundError:
+                    pass
+            for relpath in self._created:
+                try:
+                    if os.stat(self.store.abspath(relpath)).st_nlink == 1:
+                        self.store.unlink(relpath)
+                except FileNotFoundError:
+                    pass
+        self._staged = []
+        self._created = []
+
+
+# ===== DOCUMENT SCANNING =====
+
+# Events of scan_body
+PARAGRAPH, RUN, IMAGE = "paragraph", "run", "image"
+# Finds which category markers a text contains in one search
+MARKER_RE = re.compile("|".join(re.escape(cat) for cat in CATEGORIES))
+
+_xpaths = None
+
+
+def _compiled_xpaths():
+    """XPath expressions over the document body, compiled once (python-docx is imported lazily)"""
+    global _xpaths
+    if _xpaths is None:
+        from lxml import etree
+        from docx.oxml.ns import nsmap, qn
+
+        def xpath(expr):
+            return etree.XPath(expr, namespaces=nsmap)
+
+        _xpaths = {
+            # Body paragraphs, their runs and the pictures inside those runs, in document order
+            "events": xpath("./w:p | ./w:p/w:r | ./w:p/w:r//a:blip"),
+            # Children carrying the paragraph text (python-docx Paragraph.text)
+            "content": xpath("./w:r | ./w:hyperlink"),
+            "hyperlink_runs": xpath("./w:r"),
+            # Run content with a text equivalent (python-docx Run.text), each rendered by str()
+            "run_text": xpath("./w:br | ./w:cr | ./w:noBreakHyphen | ./w:ptab | ./w:t | ./w:tab"),
+            "blips": xpath("./w:p/w:r//a:blip/@r:embed"),
+            "p": qn("w:p"),
+            "r": qn("w:r"),
+            "embed": qn("r:embed"),
+        }
+    return _xpaths
+
+
+def _run_text(xp, run):
+    return "".join(str(e) for e in xp["run_text"](run))
+
+
+def scan_body(body):
+    """
+    Single pass over a document body yielding (PARAGRAPH, text) for each paragraph,
+    (RUN, text) for each of its runs and (IMAGE, rId) for each picture in a run,
+    in document order. Texts are stripped; run texts are computed once per paragraph.
+    """
+    xp = _compiled_xpaths()
+    run_texts = {}
+    for el in xp["events"](body):
+        if el.tag == xp["p"]:
+            # Keeps the paragraph's run elements (and their lxml proxies) alive as keys
+            run_texts = {}
+            for child in xp["content"](el):
+                if child.tag == xp["r"]:
+                    run_texts[child] = _run_text(xp, child)
+                else:
+                    run_texts[child] = "".join(_run_text(xp, r) for r in xp["hyperlink_runs"](child))
+            yield PARAGRAPH, "".join(run_texts.values()).strip()
+        elif el.tag == xp["r"]:
+            yield RUN, run_texts.get(el, "").strip()
+        else:
+            rid = el.get(xp["embed"])
+            if rid:
+                yield IMAGE, rid
+
+
+def count_images(doc, rel_map):
+    """Number of pictures extract_word_content will save from a document"""
+    return sum(1 for rid in _compiled_xpaths()["blips"](doc.element.body) if rid in rel_map)
+
+
+class NameAllocator:
+    """Unique file names per folder: label.ext, then label_1.ext, label_2.ext, ..."""
+
+    def __init__(self):
+        self._used = {}         # folder -> set of file names
+        self._next = {}         # (folder, stem, ext) -> next suffix to try
+
+    def allocate(self, folder, stem, ext):
+        used = self._used.setdefault(folder, set())
+        name = f"{stem}.{ext}"
+        if name in used:
+            key = (folder, stem, ext)
+            counter = self._next.get(key, 1)
+            name = f"{stem}_{counter}.{ext}"
+            # Only skips names taken by other labels (e.g. a label that is literally "x_1")
+            while name in used:
+                counter += 1
+                name = f"{stem}_{counter}.{ext}"
+            self._next[key] = counter + 1
+        used.add(name)
+        return name
+
+
+def plan_images(doc, rel_map):
+    """
+    Yield one dict per picture to save, in document order: category, round_number,
+    relative_dir, filename, label (the last text before it) and part (the image part).
+    """
+    current_category = DEFAULT_CATEGORY
+    round_counters = {cat: -1 for cat in CATEGORIES}  # Initialize all at -1
+    names = NameAllocator()
+    last_text = ""
+
+    for kind, value in scan_body(doc.element.body):
+        if kind == PARAGRAPH:
+            # Check for category/round markers
+            if MARKER_RE.search(value):
+                current_category = next(cat for cat in CATEGORIES if cat in value)
+                # Increment on EACH occurrence found to create a new round
+                round_counters[current_category] += 1
+        elif kind == RUN:
+            # A run without a marker might be a label for an image
+            if value and not MARKER_RE.search(value):
+                last_text = value
+        elif value in rel_map:
+            # If we haven't seen a round marker yet for the default category, start it at 0
+            if round_counters[current_category] == -1:
+                round_counters[current_category] = 0
+
+            target_part = rel_map[value]
+            relative_dir = os.path.join(sanitize(current_category), f"round_{round_counters[current_category]}")
+            label_name = sanitize(last_text) if last_text else "image"
+            yield {
+                "category": current_category,
+                "round_number": round_counters[current_category],
+                "relative_dir": relative_dir,
+                "filename": names.allocate(relative_dir, label_name, target_part.partname.split('.')[-1]),
+                "label": last_text,
+                "part": target_part,
+            }
+
+
+def extract_word_content(file_path, filename, images_folder=WORD_IMAGES_FOLDER, progress=None, tag=None):
+    """
+    Extract and organize images from a Word document (.docx) with per-category rounds.
+    progress(processed, total, category, round_number) is called before the first
+    image and after each one; an exception raised by it aborts and rolls back.
+    tag names the staged temp files (see StagedFiles).
+    """
+    from docx import Document
+    from db import save_word_document
+
+    doc = Document(file_path)
+    audio_source_dir = os.path.join(images_folder, AUDIO_FOLDER_NAME)
+    rel_map = {rel.rId: rel.target_part for rel in doc.part.rels.values() if "image" in rel.target_ref}
+
+    images = []     # word_images rows, written together at the end
+    created_dirs = set()
+    staged = StagedFiles(images_folder, tag)
+    try:
+        total = count_images(doc, rel_map) if progress else 0
+        if progress:
+            progress(0, total, DEFAULT_CATEGORY, None)
+        for item in plan_images(doc, rel_map):
+            relative_dir, final_filename, last_text = item["relative_dir"], item["filename"], item["label"]
+            full_dir = os.path.join(images_folder, relative_dir)
+            if full_dir not in created_dirs:
+                os.makedirs(full_dir, exist_ok=True)
+                created_dirs.add(full_dir)
+
+            # Audio mapping logic: the index matches both the raw and the sanitized label
+            db_audio_path = None
+            audio = audio_index.find(audio_source_dir, last_text)
+            if audio:
+                audio_name, ext = audio
+                # Use exact same name as image file (different extension)
+                audio_target_name = f"{os.path.splitext(final_filename)[0]}.{ext}"
+                try:
+                    # Source stays in place for other images with same label
+                    staged.copy(os.path.join(audio_source_dir, audio_name), os.path.join(full_dir, audio_target_name))
+                    db_audio_path = os.path.join(relative_dir, audio_target_name)
+                except Exception as e:
+                    print(f"Error copying audio: {e}")
+
+            staged.write(os.path.join(full_dir, final_filename), item["part"].blob)
+
+            images.append({
+                "image_path": os.path.join(relative_dir, final_filename),
+                "label": last_text if last_text else "Unnamed Image",
+                "category": item["category"],
+                "round_number": item["round_number"],
+                "audio_path": db_audio_path,
+            })
+            if progress:
+                progress(len(images), total, item["category"], item["round_number"])
+
+        # One transaction for the document and all of its image rows
+        word_id = save_word_document(filename, "", images)
+    except BaseException:
+        staged.rollback()
+        raise
+
+    staged.commit()
+    return word_id
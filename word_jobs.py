@@ -0,0 +1,209 @@
+"""
+Background Word extraction jobs.
+/upload_word saves the .docx and returns a job id right away; a worker thread
+runs word_extract.extract_word_content and reports progress (images processed
+out of total, current category and round). Jobs live in the word_jobs table,
+so queued and interrupted jobs are picked up again when the app restarts.
+A worker holds a lease on the job it runs (owner + heartbeat); a running job is
+only taken over once its lease expired, i.e. the process running it is gone.
+Extraction is all-or-nothing, so a resumed job runs the document again; files
+stored by the interrupted run are reused from the content store.
+"""
+
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import word_extract
+
+WORD_JOBS_FOLDER = os.path.join("uploads", "word_jobs")
+# Documents extracted at the same time
+WORD_JOB_WORKERS = int(os.environ.get('WORD_JOB_WORKERS', 1))
+# A job interrupted this many times (e.g. it crashes the worker) is marked failed
+WORD_JOB_MAX_ATTEMPTS = 3
+# Minimum seconds between two progress writes to the database
+PROGRESS_INTERVAL = 0.5
+# A running job whose owner sent no heartbeat for this long is taken over by another worker
+WORD_JOB_LEASE_SECONDS = 60
+HEARTBEAT_INTERVAL = WORD_JOB_LEASE_SECONDS / 4
+# Owner of the leases taken by this process
+WORKER_ID = f"{socket.gethostname()[:60]}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class WordJobCancelled(Exception):
+    pass
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+_live = {}      # job_id -> progress of jobs running in this process
+_cancel = {}    # job_id -> Event set by cancel()
+_live_lock = threading.Lock()
+_started = False
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=WORD_JOB_WORKERS, thread_name_prefix="word-job")
+            threading.Thread(target=_heartbeat, name="word-job-heartbeat", daemon=True).start()
+    return _executor
+
+
+def _heartbeat():
+    """Renew the leases of the jobs running here, also while a step reports no progress"""
+    from db import renew_word_job_leases
+
+    while True:
+        time.sleep(HEARTBEAT_INTERVAL)
+        with _live_lock:
+            job_ids = list(_cancel)
+        if not job_ids:
+            continue
+        try:
+            renew_word_job_leases(job_ids, WORKER_ID)
+        except Exception as e:
+            print(f"Word job heartbeat failed: {e}")
+
+
+def _enqueue(job_id):
+    with _live_lock:
+        _cancel.setdefault(job_id, threading.Event())
+    _get_executor().submit(_run, job_id)
+
+
+def _remove_upload(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _run(job_id):
+    from db import claim_word_job, get_word_job, update_word_job_progress, finish_word_job
+
+    try:
+        job = get_word_job(job_id)
+        if job is None:
+            return
+        if not claim_word_job(job_id, WORKER_ID, WORD_JOB_LEASE_SECONDS, WORD_JOB_MAX_ATTEMPTS):
+            if get_word_job(job_id)["status"] == "running":
+                # Leased by a live worker (or one that died less than a lease ago): look again later
+                timer = threading.Timer(WORD_JOB_LEASE_SECONDS, _enqueue, (job_id,))
+                timer.daemon = True
+                timer.start()
+            else:
+                _remove_upload(job["file_path"])
+            return
+
+        cancel = _cancel[job_id]
+        last_write = [0.0]
+
+        def progress(processed, total, category, round_number):
+            with _live_lock:
+                _live[job_id] = {"processed": processed, "total": total,
+                                 "category": category, "round_number": round_number}
+            if cancel.is_set():
+                raise WordJobCancelled()
+            now = time.monotonic()
+            if now - last_write[0] >= PROGRESS_INTERVAL or processed == total:
+                last_write[0] = now
+                # The update also notices a cancel requested through another process
+                # (or a lease lost to another worker, whose run then owns the job)
+                if not update_word_job_progress(job_id, WORKER_ID, processed, total, category, round_number):
+                    raise WordJobCancelled()
+
+        start = time.time()
+        try:
+            word_id = word_extract.extract_word_content(job["file_path"], job["filename"],
+                                                        progress=progress, tag=job_id)
+        except WordJobCancelled:
+            finished = finish_word_job(job_id, WORKER_ID, "cancelled")
+            print(f"Word job {job_id} cancelled")
+        except Exception as e:
+            finished = finish_word_job(job_id, WORKER_ID, "failed", error=str(e))
+            print(f"Word job {job_id} failed: {e}")
+        else:
+            finished = finish_word_job(job_id, WORKER_ID, "done", word_data_id=word_id)
+            print(f"Word job {job_id} done in {time.time() - start:.2f}s")
+        # A worker that took over the lease still needs the document
+        if finished:
+            _remove_upload(job["file_path"])
+    except Exception as e:
+        # Database unavailable: the job stays unfinished and is resumed on the next start
+        print(f"Word job {job_id} could not run: {e}")
+    finally:
+        with _live_lock:
+            _live.pop(job_id, None)
+            _cancel.pop(job_id, None)
+
+
+def submit(data, filename):
+    """Save an uploaded .docx, queue its extraction and return the job id"""
+    from db import create_word_job
+
+    job_id = uuid.uuid4().hex
+    os.makedirs(WORD_JOBS_FOLDER, exist_ok=True)
+    file_path = os.path.join(WORD_JOBS_FOLDER, f"{job_id}.docx")
+    with open(file_path, "wb") as f:
+        f.write(data)
+    try:
+        create_word_job(job_id, filename, file_path)
+    except Exception:
+        _remove_upload(file_path)
+        raise
+    _enqueue(job_id)
+    return job_id
+
+
+def get_job(job_id):
+    """Job dict with the latest progress (live for jobs running here), or None"""
+    from db import get_word_job
+
+    job = get_word_job(job_id)
+    if job is None:
+        return None
+    job.pop("file_path")
+    with _live_lock:
+        live = _live.get(job_id)
+    if live and job["status"] == "running":
+        job.update(live)
+    return job
+
+
+def cancel(job_id):
+    """Cancel a queued or running job; returns False if it already finished"""
+    from db import cancel_word_job
+
+    if not cancel_word_job(job_id):
+        return False
+    with _live_lock:
+        event = _cancel.get(job_id)
+    if event is not None:
+        event.set()
+    return True
+
+
+def start():
+    """Queue every unfinished job left from a previous run (once per process)"""
+    global _started
+    from db import get_unfinished_word_jobs
+
+    with _executor_lock:
+        if _started:
+            return
+        _started = True
+    try:
+        job_ids = get_unfinished_word_jobs()
+    except Exception as e:
+        print(f"Could not resume Word jobs: {e}")
+        return
+    for job_id in job_ids:
+        _enqueue(job_id)
+    if job_ids:
+        print(f"Resuming {len(job_ids)} Word extraction jobs")